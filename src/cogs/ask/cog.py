@@ -595,7 +595,7 @@ class AskCog(commands.Cog):
             response_text, latex_images = latex_utils.process_latex_formulas(response_text)
             
             # Process markdown tables
-            response_text, table_images = table_utils.process_markdown_tables(response_text)
+            response_text, table_images = await table_utils.process_markdown_tables_async(response_text)
             
             # Combine all images (latex + tables)
             all_formula_images = latex_images + table_images
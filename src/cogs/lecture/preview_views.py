@@ -154,10 +154,10 @@ class PreviewProcessor:
         except Exception as e:
             logger.warning(f"Failed to update status: {e}")
     
-    def cleanup(self):
+    async def cleanup(self):
         """Clean up temporary files"""
         from services.video import cleanup_files
-        cleanup_files(self.temp_files)
+        await cleanup_files(self.temp_files)
         self.temp_files = []
     
     async def collect_documents(self):
@@ -376,7 +376,7 @@ class PreviewProcessor:
             
             # Process markdown tables
             from utils import table_utils
-            summary, table_images = table_utils.process_markdown_tables(summary)
+            summary, table_images = await table_utils.process_markdown_tables_async(summary)
             
             # Combine all images
             all_images = latex_images + table_images
@@ -424,7 +424,7 @@ class PreviewProcessor:
                     logger.warning(f"Failed to re-upload {doc.path}: {e}")
             
             await self.update_status("✅ Hoàn thành!")
-            self.cleanup()
+            await self.cleanup()
             
             # ==================================
             # STAGE 5: Save lecture context for !ask
@@ -567,7 +567,7 @@ class PreviewErrorView(discord.ui.View):
     @discord.ui.button(label="❌ Đóng", style=discord.ButtonStyle.danger)
     async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Close error view"""
-        self.processor.cleanup()
+        await self.processor.cleanup()
         await interaction.response.edit_message(content="✅ Đã đóng", view=None)
 
 
@@ -9,7 +9,7 @@ import os
 from typing import Optional
 
 from services import gemini, video_download, video, lecture_cache, prompts
-from utils import latex_utils
+from utils import latex_utils, table_utils
 from services.video import format_timestamp, cleanup_files
 from services.slides import SlidesError
 from utils.lecture_utils import (
@@ -419,7 +419,7 @@ class VideoErrorView(discord.ui.View):
     @discord.ui.button(label="❌ Đóng", style=discord.ButtonStyle.danger)
     async def close_button(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Cleanup any temp files
-        self.processor.cleanup()
+        await self.processor.cleanup()
         await interaction.response.edit_message(content="✅ Đã đóng", view=None)
 
 
@@ -463,7 +463,7 @@ class SlidesErrorView(discord.ui.View):
     
     @discord.ui.button(label="❌ Hủy", style=discord.ButtonStyle.danger)
     async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.processor.cleanup()
+        await self.processor.cleanup()
         await interaction.response.edit_message(content="❌ Đã hủy", view=None)
         self.choice = "cancel"
         self.stop()
@@ -599,25 +599,28 @@ class VideoLectureProcessor:
         except Exception as e:
             logger.warning(f"Failed to update status: {e}")
     
-    def cleanup(self):
+    async def cleanup(self):
         """Clean up temporary files"""
-        cleanup_files(self.temp_files)
+        await cleanup_files(self.temp_files)
         self.temp_files = []
     
     async def process(self, retry: bool = False):
-        """Main processing pipeline with parallel AssemblyAI + video split + PDF"""
+        """Queue the processing pipeline (one video at a time)"""
         from services import queue
+        
+        # Check queue and wait if needed
+        queue_len = queue.get_queue_length()
+        if queue_len > 0:
+            await self.update_status(f"⏳ Đang chờ trong hàng đợi (vị trí {queue_len + 1})...")
+        
+        await queue.submit(lambda: self._run_pipeline(retry))
+    
+    async def _run_pipeline(self, retry: bool = False):
+        """Main processing pipeline with parallel AssemblyAI + video split + PDF"""
         from services import config as config_service
         from services import slides as slides_service
         
         try:
-            # Check queue and wait if needed
-            queue_len = queue.get_queue_length()
-            if queue_len > 0:
-                await self.update_status(f"⏳ Đang chờ trong hàng đợi (vị trí {queue_len + 1})...")
-            
-            await queue.acquire_video_slot()
-            
             # Load user's API keys - use pool for auto-rotation
             from services.gemini_keys import GeminiKeyPool
             user_gemini_keys = config_service.get_user_gemini_apis(self.user_id)
@@ -942,7 +945,7 @@ class VideoLectureProcessor:
                 if part_num in cached_parts:
                     logger.info(f"Using cached summary for part {part_num}")
                     summaries.append(cached_parts[part_num]["summary"])
-                    cleanup_files([part["path"]])
+                    await cleanup_files([part["path"]])
                     continue
                 
                 await self.update_status(
@@ -1029,7 +1032,7 @@ class VideoLectureProcessor:
                     finally:
                         if gemini_file:
                             try:
-                                gemini.cleanup_file(gemini_file, api_key=current_key)
+                                await gemini.cleanup_file(gemini_file, api_key=current_key)
                             except Exception:
                                 pass
                 
@@ -1043,7 +1046,7 @@ class VideoLectureProcessor:
                 summaries.append(summary)
                 
                 # Delete part video after successful processing
-                cleanup_files([part["path"]])
+                await cleanup_files([part["path"]])
                 if part["path"] in self.temp_files:
                     self.temp_files.remove(part["path"])
                 
@@ -1170,8 +1173,7 @@ class VideoLectureProcessor:
             final_summary, latex_images = latex_utils.process_latex_formulas(final_summary)
             
             # Process markdown tables
-            from utils import table_utils
-            final_summary, table_images = table_utils.process_markdown_tables(final_summary)
+            final_summary, table_images = await table_utils.process_markdown_tables_async(final_summary)
             
             # Combine all images
             all_images = latex_images + table_images
@@ -1211,13 +1213,8 @@ class VideoLectureProcessor:
                     m = await send_chunked(channel, remaining_text)
                     msgs_sent.extend(m)
                 
-                # Cleanup LaTeX images
-                for _, img_path in latex_imgs:
-                    try:
-                        if os.path.exists(img_path):
-                            os.remove(img_path)
-                    except Exception:
-                        pass
+                # Cleanup LaTeX/table images (cached table renders are kept)
+                table_utils.cleanup_table_images(latex_imgs)
                 return msgs_sent
             
             # Check if we have slides to embed
@@ -1257,7 +1254,7 @@ class VideoLectureProcessor:
                         self.interaction.channel, parsed_parts, self.video_path
                     )
                     messages_to_track.extend(msgs)
-                    cleanup_files(frame_paths)
+                    await cleanup_files(frame_paths)
                 else:
                     # Send with LaTeX images if any
                     msgs = await send_with_latex_images(self.interaction.channel, header + final_summary, all_images)
@@ -1305,7 +1302,7 @@ class VideoLectureProcessor:
             
             # Cleanup cache and temp files
             lecture_cache.clear_pipeline_cache(self.cache_id)
-            self.cleanup()
+            await self.cleanup()
             
             await self.update_status("✅ Hoàn thành! Summary đã được gửi lên channel.")
             
@@ -1388,10 +1385,6 @@ class VideoLectureProcessor:
             
             if not sent:
                 logger.error("CRITICAL: Could not send error view through any method!")
-        
-        finally:
-            # Always release queue slot
-            queue.release_video_slot()
     
     def _condense_summaries(self, summaries: list[str], max_chars: int = 2000) -> str:
         """Condense summaries for context in next part"""
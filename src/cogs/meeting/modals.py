@@ -11,7 +11,7 @@ from datetime import datetime, timedelta
 import discord
 
 from services import fireflies, fireflies_api, llm, scheduler, transcript_storage, slides as slides_service
-from utils import latex_utils
+from utils import latex_utils, table_utils
 from utils.discord_utils import send_chunked
 from cogs.shared.feedback_view import FeedbackView
 
@@ -49,13 +49,8 @@ async def _send_with_latex_images(channel, text: str, latex_imgs: list) -> list[
         msgs = await send_chunked(channel, remaining_text)
         sent_ids.extend([m.id for m in (msgs or [])])
     
-    # Cleanup LaTeX images
-    for _, img_path in latex_imgs:
-        try:
-            if os.path.exists(img_path):
-                os.remove(img_path)
-        except Exception:
-            pass
+    # Cleanup LaTeX/table images (cached table renders are kept)
+    table_utils.cleanup_table_images(latex_imgs)
     
     return sent_ids
 
@@ -364,8 +359,7 @@ class MeetingIdModal(discord.ui.Modal, title="Meeting Summary"):
                         )
                         if new_summary and not new_summary.startswith("⚠️ LLM"):
                             new_summary, latex_imgs = latex_utils.process_latex_formulas(new_summary)
-                            from utils import table_utils
-                            new_summary, table_imgs = table_utils.process_markdown_tables(new_summary)
+                            new_summary, table_imgs = await table_utils.process_markdown_tables_async(new_summary)
                             all_imgs = latex_imgs + table_imgs
                             if all_imgs:
                                 await _send_with_latex_images(retry_interaction.channel, kwargs["header"] + new_summary, all_imgs)
@@ -409,8 +403,7 @@ class MeetingIdModal(discord.ui.Modal, title="Meeting Summary"):
                 summary, latex_images = latex_utils.process_latex_formulas(summary)
                 
                 # Process markdown tables
-                from utils import table_utils
-                summary, table_images = table_utils.process_markdown_tables(summary)
+                summary, table_images = await table_utils.process_markdown_tables_async(summary)
                 
                 # Combine all images
                 all_images = latex_images + table_images
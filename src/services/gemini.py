@@ -5,8 +5,11 @@ Supports multi-key personal API with auto-rotation on rate limits
 """
 import os
 import time
+import hashlib
 import logging
 import asyncio
+import functools
+from collections import OrderedDict
 from typing import Optional, Callable, Any
 
 from google import genai
@@ -14,24 +17,29 @@ from google.genai import types
 
 logger = logging.getLogger(__name__)
 
-# No global client - always create fresh per request
+# Clients are cached per API key (bounded LRU) so HTTP connections stay warm
+# across upload/generate/delete calls without sharing one global client
+
+
+@functools.lru_cache(maxsize=64)
+def _build_client(api_key: str):
+    """Create Gemini client for a concrete API key (cached)."""
+    return genai.Client(api_key=api_key)
 
 
 def get_client(api_key: Optional[str] = None):
     """
-    Create Gemini client with given or env API key.
-    Always creates a fresh client per request.
+    Get Gemini client with given or env API key.
+    Env key is resolved at call time, then the client is reused per key.
     """
-    # genai imported at module level
-    
     if api_key:
-        return genai.Client(api_key=api_key)
+        return _build_client(api_key)
     
     # Fallback to env
     env_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
     if not env_key:
         raise ValueError("No Gemini API key provided")
-    return genai.Client(api_key=env_key)
+    return _build_client(env_key)
 
 
 async def call_with_personal_keys(
@@ -100,6 +108,20 @@ async def call_with_personal_keys(
 DEFAULT_MODEL = "gemini-3-flash-preview"
 DEFAULT_THINKING = "high"
 
+# GenerateContentConfig per thinking level (built once, reused by every call)
+_CONFIG_BY_LEVEL: dict[str, types.GenerateContentConfig] = {}
+
+
+def _thinking_config(level: str = DEFAULT_THINKING) -> types.GenerateContentConfig:
+    """Get shared GenerateContentConfig for a thinking level."""
+    config = _CONFIG_BY_LEVEL.get(level)
+    if config is None:
+        config = types.GenerateContentConfig(
+            thinking_config=types.ThinkingConfig(thinking_level=level)
+        )
+        _CONFIG_BY_LEVEL[level] = config
+    return config
+
 
 def _call_gemini_sync(
     client,
@@ -120,8 +142,6 @@ def _call_gemini_sync(
     Returns:
         Response text
     """
-    from google.genai import types
-    
     start = time.time()
     
     # Retry once if empty response
@@ -129,9 +149,7 @@ def _call_gemini_sync(
         response = client.models.generate_content(
             model=model,
             contents=contents,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_level=thinking_level)
-            ),
+            config=_thinking_config(thinking_level),
         )
         
         # Handle None/empty response (can happen when blocked or error)
@@ -190,14 +208,14 @@ async def upload_video(video_path: str, api_key: Optional[str] = None):
     logger.info(f"Uploading video: {video_path}")
     start = time.time()
     
-    # Upload (sync, but fast)
-    myfile = client.files.upload(file=video_path)
+    # Upload in thread pool (sync SDK call, blocks for the whole transfer)
+    myfile = await asyncio.to_thread(client.files.upload, file=video_path)
     logger.info(f"Uploaded in {time.time()-start:.1f}s, name={myfile.name}")
     
     # Wait for processing
     while myfile.state.name == "PROCESSING":
         await asyncio.sleep(10)
-        myfile = client.files.get(name=myfile.name)
+        myfile = await asyncio.to_thread(client.files.get, name=myfile.name)
         logger.info(f"  State: {myfile.state.name}")
     
     if myfile.state.name == "FAILED":
@@ -220,6 +238,11 @@ async def generate_lecture_summary(
     return await _call_gemini(client, [video_file, prompt])
 
 
+# Merge results keyed by hash of the full merge prompt (parts + transcript + context)
+_MERGE_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_MERGE_CACHE_MAX = 16
+
+
 async def merge_summaries(
     summaries: list[str],
     merge_prompt: str,
@@ -233,9 +256,9 @@ async def merge_summaries(
     client = get_client(api_key)
     
     # Build context with part summaries
-    parts_text = ""
-    for i, summary in enumerate(summaries, 1):
-        parts_text += f"\n**PHẦN {i}:**\n{summary}\n"
+    parts_text = "".join(
+        f"\n**PHẦN {i}:**\n{summary}\n" for i, summary in enumerate(summaries, 1)
+    )
     
     # Truncate transcript if too long (keep first 50k chars)
     if len(full_transcript) > 50000:
@@ -254,9 +277,23 @@ async def merge_summaries(
         chat_links=chat_links,
     )
     
+    # Reuse previous merge if inputs are identical (e.g. retry after a later stage failed)
+    cache_key = hashlib.blake2b(full_prompt.encode("utf-8")).hexdigest()
+    cached = _MERGE_CACHE.get(cache_key)
+    if cached is not None:
+        _MERGE_CACHE.move_to_end(cache_key)
+        logger.info(f"Merge cache hit for {len(summaries)} summaries, skipping Gemini call")
+        return cached
+    
     logger.info(f"Merging {len(summaries)} summaries (transcript={len(full_transcript)} chars, extra_context={len(extra_context)} chars, links={len(chat_links)} chars)...")
     
-    return await _call_gemini(client, full_prompt)
+    merged = await _call_gemini(client, full_prompt)
+    
+    _MERGE_CACHE[cache_key] = merged
+    if len(_MERGE_CACHE) > _MERGE_CACHE_MAX:
+        _MERGE_CACHE.popitem(last=False)
+    
+    return merged
 
 
 
@@ -283,8 +320,6 @@ async def summarize_meeting(
     Returns:
         Meeting summary
     """
-    from google.genai import types
-    
     client = get_client(api_key)
     
     logger.info(f"Generating meeting summary (Gemini multimodal, slides={'yes' if pdf_path else 'no'})...")
@@ -294,13 +329,13 @@ async def summarize_meeting(
     if pdf_path:
         logger.info(f"Uploading PDF: {pdf_path}")
         start_upload = time.time()
-        pdf_file = client.files.upload(file=pdf_path)
+        pdf_file = await asyncio.to_thread(client.files.upload, file=pdf_path)
         logger.info(f"PDF uploaded in {time.time()-start_upload:.1f}s, name={pdf_file.name}")
         
         # Wait for processing
         while pdf_file.state.name == "PROCESSING":
             await asyncio.sleep(5)
-            pdf_file = client.files.get(name=pdf_file.name)
+            pdf_file = await asyncio.to_thread(client.files.get, name=pdf_file.name)
             logger.info(f"  PDF state: {pdf_file.state.name}")
         
         if pdf_file.state.name == "FAILED":
@@ -323,9 +358,7 @@ async def summarize_meeting(
         return client.models.generate_content(
             model="gemini-3-flash-preview",
             contents=content,
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_level="high")
-            ),
+            config=_thinking_config("high"),
         )
     
     # Retry loop
@@ -340,7 +373,7 @@ async def summarize_meeting(
             # Cleanup PDF file
             if pdf_file:
                 try:
-                    client.files.delete(name=pdf_file.name)
+                    await asyncio.to_thread(client.files.delete, name=pdf_file.name)
                     logger.info(f"Deleted PDF file: {pdf_file.name}")
                 except Exception as e:
                     logger.warning(f"Failed to delete PDF: {e}")
@@ -358,7 +391,7 @@ async def summarize_meeting(
     # Cleanup on failure
     if pdf_file:
         try:
-            client.files.delete(name=pdf_file.name)
+            await asyncio.to_thread(client.files.delete, name=pdf_file.name)
         except Exception:
             pass
     
@@ -385,8 +418,6 @@ async def summarize_transcript(
     Returns:
         Summary text or raises exception on failure
     """
-    from google.genai import types
-    
     client = get_client(api_key)
     
     # Inject slide content if provided
@@ -410,9 +441,7 @@ async def summarize_transcript(
                     contents=[
                         {"role": "user", "parts": [{"text": full_prompt + "\n\n" + user_content}]}
                     ],
-                    config=types.GenerateContentConfig(
-                        thinking_config=types.ThinkingConfig(thinking_level="high")
-                    ),
+                    config=_thinking_config("high"),
                 )
             
             response = await asyncio.to_thread(_summarize)
@@ -604,11 +633,11 @@ def strip_page_markers(text: str) -> str:
 
 
 
-def cleanup_file(file, api_key: Optional[str] = None) -> None:
+async def cleanup_file(file, api_key: Optional[str] = None) -> None:
     """Delete uploaded file from Gemini"""
     try:
         client = get_client(api_key)
-        client.files.delete(name=file.name)
+        await asyncio.to_thread(client.files.delete, name=file.name)
         logger.info(f"Deleted Gemini file: {file.name}")
     except Exception as e:
         logger.warning(f"Failed to delete Gemini file: {e}")
@@ -634,8 +663,6 @@ async def summarize_pdfs(
     Returns:
         Generated summary text
     """
-    from google.genai import types
-    
     client = get_client(api_key)
     
     # Format prompt with pdf_links
@@ -660,9 +687,7 @@ async def summarize_pdfs(
             response = client.models.generate_content(
                 model="gemini-3-flash-preview",
                 contents=contents,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level=thinking_level)
-                ),
+                config=_thinking_config(thinking_level),
             )
             
             logger.info(f"Generated in {time.time()-start:.1f}s, {len(response.text)} chars")
@@ -721,7 +746,6 @@ async def match_slides_to_summary(
     Returns:
         Summary with [-PAGE:X:"description"-] markers inserted
     """
-    from google.genai import types
     from services.prompts import SLIDE_MATCHING_PROMPT
     
     if not slide_images_b64:
@@ -755,9 +779,7 @@ async def match_slides_to_summary(
         response = client.models.generate_content(
             model="gemini-3-flash-preview",
             contents=[{"role": "user", "parts": content_parts}],
-            config=types.GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(thinking_level="high")
-            ),
+            config=_thinking_config("high"),
         )
         logger.info(f"Slide matching completed in {time.time()-start:.1f}s")
         return response.text
@@ -791,7 +813,7 @@ async def validate_and_pick_best_image(
                 logger.warning("No Gemini API key for image validation")
                 return 0, None  # Default to first image if no key
             
-            client = genai.Client(api_key=key)
+            client = get_client(key)
             
             # Create image parts
             contents = []
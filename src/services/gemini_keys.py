@@ -3,6 +3,7 @@ Gemini Key Manager
 Smart key rotation, rate limit handling, and request counting for multi-key Gemini API.
 """
 import json
+import time
 import hashlib
 import logging
 from datetime import datetime
@@ -12,34 +13,121 @@ from zoneinfo import ZoneInfo
 
 logger = logging.getLogger(__name__)
 
-# Storage for usage tracking
-USAGE_FILE = Path(__file__).parent.parent.parent / "data" / "gemini_usage.json"
+# Append-only journal of request increments (one JSON record per line)
+USAGE_JOURNAL = Path(__file__).parent.parent.parent / "data" / "gemini_usage.jsonl"
+
+# Previous storage format ({user: {pt_date: {key_hash: count}}}), migrated once on load
+LEGACY_USAGE_FILE = USAGE_JOURNAL.with_name("gemini_usage.json")
 
 # Pacific Time for Gemini quota reset
 PT_TIMEZONE = ZoneInfo("America/Los_Angeles")
 
+# In-memory counts for the current PT date: user_key -> key_hash -> count
+_usage_cache: Optional[dict[str, dict[str, int]]] = None
+_usage_date: Optional[str] = None
 
-def _ensure_usage_file():
-    """Ensure usage file exists."""
-    USAGE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if not USAGE_FILE.exists():
-        USAGE_FILE.write_text("{}")
+
+def _replay_journal(pt_date: str) -> tuple[dict[str, dict[str, int]], bool]:
+    """
+    Replay journal records for the given PT date.
+    
+    Returns:
+        Tuple of (counts, has_stale) - has_stale is True if the journal
+        contains records from other days (or unreadable lines)
+    """
+    counts: dict[str, dict[str, int]] = {}
+    has_stale = False
+    
+    if not USAGE_JOURNAL.exists():
+        return counts, has_stale
+    
+    with open(USAGE_JOURNAL, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                has_stale = True
+                continue
+            
+            if record.get("d") != pt_date:
+                has_stale = True
+                continue
+            
+            user_counts = counts.setdefault(str(record["u"]), {})
+            user_counts[record["k"]] = user_counts.get(record["k"], 0) + record.get("n", 1)
+    
+    return counts, has_stale
 
 
-def _load_usage() -> dict:
-    """Load usage data."""
-    _ensure_usage_file()
+def _migrate_legacy_usage(pt_date: str):
+    """
+    Seed the journal with today's counts from the old gemini_usage.json, then remove it.
+    Each key gets one record carrying its count ("n"), so limits survive the upgrade.
+    """
+    if not LEGACY_USAGE_FILE.exists():
+        return
+    
     try:
-        return json.loads(USAGE_FILE.read_text())
-    except Exception as e:
-        logger.error(f"Failed to load usage data: {e}")
-        return {}
+        legacy = json.loads(LEGACY_USAGE_FILE.read_text(encoding="utf-8"))
+    except ValueError:
+        legacy = {}
+    
+    now = time.time()
+    lines = []
+    for user_key, days in legacy.items():
+        for key_hash, count in (days.get(pt_date) or {}).items():
+            if count > 0:
+                record = {"u": user_key, "d": pt_date, "k": key_hash, "n": count, "t": now}
+                lines.append(json.dumps(record) + "\n")
+    
+    if lines:
+        with open(USAGE_JOURNAL, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+    LEGACY_USAGE_FILE.unlink()
+    logger.info(f"Migrated {len(lines)} usage counts from {LEGACY_USAGE_FILE.name}")
 
 
-def _save_usage(data: dict):
-    """Save usage data."""
-    _ensure_usage_file()
-    USAGE_FILE.write_text(json.dumps(data, indent=2))
+def _compact_journal(pt_date: str):
+    """Rewrite journal keeping only records for the given PT date."""
+    kept = []
+    with open(USAGE_JOURNAL, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                if json.loads(line).get("d") == pt_date:
+                    kept.append(line)
+            except ValueError:
+                continue
+    
+    tmp_path = USAGE_JOURNAL.with_suffix(".jsonl.tmp")
+    tmp_path.write_text("".join(kept), encoding="utf-8")
+    tmp_path.replace(USAGE_JOURNAL)
+    logger.info(f"Compacted usage journal: kept {len(kept)} records for {pt_date}")
+
+
+def _load_usage() -> dict[str, dict[str, int]]:
+    """
+    Get today's usage counts.
+    Replays the journal on first use and on PT date rollover (compacting old days).
+    """
+    global _usage_cache, _usage_date
+    
+    pt_date = get_pt_date()
+    if _usage_cache is not None and _usage_date == pt_date:
+        return _usage_cache
+    
+    counts: dict[str, dict[str, int]] = {}
+    try:
+        USAGE_JOURNAL.parent.mkdir(parents=True, exist_ok=True)
+        _migrate_legacy_usage(pt_date)
+        counts, has_stale = _replay_journal(pt_date)
+        if has_stale:
+            _compact_journal(pt_date)
+    except Exception as e:
+        logger.error(f"Failed to load usage data: {e}")
+    
+    _usage_cache = counts
+    _usage_date = pt_date
+    return _usage_cache
 
 
 def get_pt_date() -> str:
@@ -55,22 +143,18 @@ def _hash_key(api_key: str) -> str:
 def increment_request_count(user_id: int, api_key: str):
     """Increment request count for a key on current PT date."""
     data = _load_usage()
-    user_key = str(user_id)
-    pt_date = get_pt_date()
+    pt_date = _usage_date
     key_hash = _hash_key(api_key)
     
-    if user_key not in data:
-        data[user_key] = {}
-    
-    if pt_date not in data[user_key]:
-        # New day - reset counts
-        data[user_key] = {pt_date: {}}
-    
-    if key_hash not in data[user_key][pt_date]:
-        data[user_key][pt_date][key_hash] = 0
+    user_counts = data.setdefault(str(user_id), {})
+    user_counts[key_hash] = user_counts.get(key_hash, 0) + 1
     
-    data[user_key][pt_date][key_hash] += 1
-    _save_usage(data)
+    record = {"u": user_id, "d": pt_date, "k": key_hash, "t": time.time()}
+    try:
+        with open(USAGE_JOURNAL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    except Exception as e:
+        logger.error(f"Failed to save usage data: {e}")
 
 
 def get_daily_counts(user_id: int) -> dict[str, int]:
@@ -81,13 +165,7 @@ def get_daily_counts(user_id: int) -> dict[str, int]:
         Dict of key_hash -> count
     """
     data = _load_usage()
-    user_key = str(user_id)
-    pt_date = get_pt_date()
-    
-    if user_key not in data:
-        return {}
-    
-    return data[user_key].get(pt_date, {})
+    return dict(data.get(str(user_id), {}))
 
 
 def get_key_count(user_id: int, api_key: str) -> int:
@@ -4,6 +4,7 @@ Scrape Google Images for illustrations
 """
 
 import re
+import asyncio
 import logging
 from typing import Optional
 
@@ -19,6 +20,11 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.5",
 }
 
+# Image URLs embedded in Google Images HTML (matched on raw bytes, no decode)
+_IMG_URL_RE = re.compile(rb'"(https?://[^"]+?\.(?:jpe?g|png|gif|webp)[^"]*)"', re.IGNORECASE)
+# Google's own thumbnails/assets
+_SKIP_RE = re.compile(r'google|gstatic', re.IGNORECASE)
+
 
 async def search_images_google(query: str, num_results: int = 10) -> list[str]:
     """
@@ -45,40 +51,61 @@ async def search_images_google(query: str, num_results: int = 10) -> list[str]:
                 logger.warning(f"Google Images returned {resp.status_code}")
                 return []
             
-            # Extract image URLs from response
+            # Extract image URLs from response (single pass, stop early)
             results = []
-            patterns = [
-                r'"(https?://[^"]+\.(?:jpg|jpeg|png|gif|webp)[^"]*)"',
-                r'\["(https?://[^"]+\.(?:jpg|jpeg|png|gif|webp)[^"]*)"',
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, resp.text, re.IGNORECASE)
-                for match in matches:
-                    # Filter out Google's own URLs
-                    if "google" not in match.lower() and "gstatic" not in match.lower():
-                        if match not in results:
-                            results.append(match)
-                            if len(results) >= num_results:
-                                break
+            seen = set()
+            for m in _IMG_URL_RE.finditer(resp.content):
+                url = m.group(1).decode("utf-8", errors="replace")
+                # Filter out Google's own URLs
+                if url in seen or _SKIP_RE.search(url):
+                    continue
+                seen.add(url)
+                results.append(url)
                 if len(results) >= num_results:
                     break
             
             logger.info(f"Found {len(results)} image URLs for '{query[:30]}...'")
-            return results[:num_results]
+            return results
             
     except Exception as e:
         logger.error(f"Google Images search failed: {e}")
         return []
 
 
+async def _fetch_image(
+    client: httpx.AsyncClient,
+    url: str,
+    min_size: int,
+) -> tuple[Optional[bytes], Optional[str]]:
+    """Download a single image, returning (None, None) if invalid."""
+    try:
+        resp = await client.get(url, headers={
+            "User-Agent": HEADERS["User-Agent"],
+            "Accept": "image/*,*/*;q=0.8",
+        })
+        
+        content_type = resp.headers.get("content-type", "")
+        
+        if resp.status_code == 200 and "image" in content_type:
+            if len(resp.content) >= min_size:
+                return resp.content, content_type
+            else:
+                logger.debug(f"Image too small: {len(resp.content)} bytes")
+                
+    except Exception as e:
+        logger.debug(f"Failed to download {url[:50]}: {e}")
+    
+    return None, None
+
+
 async def download_first_valid(
     urls: list[str], 
     max_tries: int = 5,
     min_size: int = 5000,
 ) -> tuple[Optional[bytes], Optional[str]]:
     """
-    Try downloading images until one succeeds.
+    Download candidate images concurrently and return the first valid one.
+    Remaining downloads are cancelled once a valid image arrives.
     
     Args:
         urls: List of image URLs to try
@@ -88,26 +115,30 @@ async def download_first_valid(
     Returns:
         Tuple of (image_bytes, content_type) or (None, None)
     """
-    async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
-        for url in urls[:max_tries]:
-            try:
-                resp = await client.get(url, headers={
-                    "User-Agent": HEADERS["User-Agent"],
-                    "Accept": "image/*,*/*;q=0.8",
-                })
-                
-                content_type = resp.headers.get("content-type", "")
-                
-                if resp.status_code == 200 and "image" in content_type:
-                    if len(resp.content) >= min_size:
-                        logger.info(f"Downloaded image: {len(resp.content)} bytes")
-                        return resp.content, content_type
-                    else:
-                        logger.debug(f"Image too small: {len(resp.content)} bytes")
-                        
-            except Exception as e:
-                logger.debug(f"Failed to download {url[:50]}: {e}")
-                continue
+    candidates = urls[:max_tries]
+    if not candidates:
+        logger.warning("No valid images could be downloaded")
+        return None, None
+    
+    limits = httpx.Limits(max_connections=len(candidates))
+    async with httpx.AsyncClient(timeout=10, follow_redirects=True, limits=limits) as client:
+        pending = {
+            asyncio.create_task(_fetch_image(client, url, min_size))
+            for url in candidates
+        }
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    image_bytes, content_type = task.result()
+                    if image_bytes is not None:
+                        logger.info(f"Downloaded image: {len(image_bytes)} bytes")
+                        return image_bytes, content_type
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
     
     logger.warning("No valid images could be downloaded")
     return None, None
@@ -4,48 +4,93 @@ Limits concurrent video processing to prevent RAM exhaustion
 """
 import asyncio
 import logging
+from typing import Any, Awaitable, Callable, Optional
 
 logger = logging.getLogger(__name__)
 
-# Global semaphore - only 1 video processing at a time
-_video_semaphore = asyncio.Semaphore(1)
-_queue_position = 0
-_current_position = 0
+# Pending jobs: (future, coroutine factory) - processed one at a time by _worker
+_jobs: asyncio.Queue = asyncio.Queue()
+_worker_task: Optional[asyncio.Task] = None
+_busy = False
 
 
-async def acquire_video_slot() -> int:
+async def _run(coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Await a job inside its own task (errors from the factory call included)"""
+    return await coro_factory()
+
+
+async def _worker():
+    """Run queued video jobs sequentially (only 1 video processing at a time)"""
+    global _busy
+    while True:
+        fut, coro_factory = await _jobs.get()
+
+        # Submitter gave up while waiting (e.g. interaction cancelled)
+        if fut.cancelled():
+            _jobs.task_done()
+            continue
+
+        _busy = True
+        logger.info(f"Video processing started ({_jobs.qsize()} waiting)")
+        # Run the job as its own task: asyncio.wait never raises for the job's outcome,
+        # so a CancelledError here always means the worker itself is being cancelled
+        job = asyncio.ensure_future(_run(coro_factory))
+        try:
+            await asyncio.wait({job})
+        except asyncio.CancelledError:
+            job.cancel()
+            fut.cancel()
+            raise
+        finally:
+            _busy = False
+            _jobs.task_done()
+            logger.info("Video processing slot released")
+        
+        if job.cancelled():
+            fut.cancel()
+            continue
+        error = job.exception()  # Retrieved even if the submitter is gone
+        if fut.done():
+            continue
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(job.result())
+
+
+def _ensure_worker():
+    """Start the worker task on the running loop if not alive"""
+    global _worker_task
+    if _worker_task is None or _worker_task.done():
+        _worker_task = asyncio.get_running_loop().create_task(_worker())
+
+
+async def submit(coro_factory: Callable[[], Awaitable[Any]]) -> Any:
     """
-    Acquire slot for video processing.
-    Blocks if another video is being processed.
-    Returns the queue position for logging.
+    Queue a video processing job and wait for its result.
+    Blocks until all earlier jobs have finished.
+
+    Args:
+        coro_factory: Zero-arg callable returning the coroutine to run
+
+    Returns:
+        Result of the coroutine (exceptions are re-raised)
     """
-    global _queue_position, _current_position
-    _queue_position += 1
-    my_position = _queue_position
-    
-    if _video_semaphore.locked():
-        wait_count = my_position - _current_position
-        logger.info(f"Video processing queued at position {wait_count}")
-    
-    await _video_semaphore.acquire()
-    _current_position = my_position
-    logger.info(f"Video processing slot acquired (position {my_position})")
-    return my_position
-
-
-def release_video_slot():
-    """Release video processing slot"""
-    _video_semaphore.release()
-    logger.info("Video processing slot released")
+    _ensure_worker()
+    fut = asyncio.get_running_loop().create_future()
+    await _jobs.put((fut, coro_factory))
+
+    if _busy:
+        logger.info(f"Video processing queued at position {_jobs.qsize()}")
+
+    return await fut
 
 
 def get_queue_length() -> int:
     """Get number of waiting requests (not including current)"""
-    if not _video_semaphore.locked():
-        return 0
-    return _queue_position - _current_position
+    return _jobs.qsize()
 
 
 def is_slot_available() -> bool:
     """Check if video processing slot is available"""
-    return not _video_semaphore.locked()
+    return not _busy and _jobs.empty()
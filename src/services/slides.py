@@ -7,6 +7,7 @@ Convert PDF slides to images for embedding in Discord.
 import asyncio
 import logging
 import os
+import shutil
 from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
@@ -21,6 +22,39 @@ class SlidesError(Exception):
     pass
 
 
+# Optional libjpeg-turbo encoder (PyTurboJPEG), resolved on first use
+_turbojpeg = None
+_turbojpeg_checked = False
+
+
+def _get_turbojpeg():
+    """Get shared TurboJPEG encoder, or None if PyTurboJPEG is unavailable."""
+    global _turbojpeg, _turbojpeg_checked
+    if not _turbojpeg_checked:
+        _turbojpeg_checked = True
+        try:
+            from turbojpeg import TurboJPEG
+            _turbojpeg = TurboJPEG()
+        except Exception as e:
+            logger.debug(f"TurboJPEG unavailable, using PIL encoder: {e}")
+    return _turbojpeg
+
+
+def _save_jpeg(image, image_path: str, quality: int = 85):
+    """Save PIL image as JPEG - SIMD TurboJPEG encode if available, else PIL."""
+    tj = _get_turbojpeg()
+    if tj is not None and image.mode == "RGB":
+        import numpy as np
+        from turbojpeg import TJPF_RGB
+        
+        pixels = np.asarray(image, dtype=np.uint8)
+        with open(image_path, "wb") as f:
+            f.write(tj.encode(pixels, quality=quality, pixel_format=TJPF_RGB))
+        return
+    
+    image.save(image_path, "JPEG", quality=quality)
+
+
 def pdf_to_images(pdf_path: str, output_dir: str = "/tmp") -> list[str]:
     """
     Convert PDF to images (one per page).
@@ -124,7 +158,7 @@ def pdf_to_images(pdf_path: str, output_dir: str = "/tmp") -> list[str]:
                 for i, page_image in enumerate(pages):
                     current_page = page_num + i
                     image_path = os.path.join(images_dir, f"page_{current_page:03d}.jpg")
-                    page_image.save(image_path, "JPEG", quality=85)
+                    _save_jpeg(page_image, image_path, quality=85)
                     image_paths.append(image_path)
                 
                 # Explicit cleanup to help garbage collector
@@ -206,22 +240,20 @@ def cleanup_slide_images(image_paths: list[str]):
     if not image_paths:
         return
     
-    # Delete individual images
+    # pdf_to_images owns its slides_<name> directory - remove it in one go
+    images_dir = os.path.dirname(image_paths[0])
+    if os.path.basename(images_dir).startswith("slides_"):
+        shutil.rmtree(images_dir, ignore_errors=True)
+        return
+    
+    # Unknown layout - only delete the given files
     for path in image_paths:
         try:
-            if os.path.exists(path):
-                os.remove(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.warning(f"Failed to delete {path}: {e}")
-    
-    # Try to remove directory if empty
-    if image_paths:
-        try:
-            images_dir = os.path.dirname(image_paths[0])
-            if os.path.exists(images_dir) and not os.listdir(images_dir):
-                os.rmdir(images_dir)
-        except Exception as e:
-            logger.warning(f"Failed to remove directory: {e}")
 
 
 def extract_links_from_pdf(pdf_path: str) -> list[tuple[int, str]]:
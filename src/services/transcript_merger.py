@@ -2,20 +2,47 @@
 Transcript Merger - Merge chat session with AssemblyAI transcript by timestamp.
 """
 import re
+import heapq
 import logging
-from typing import Optional
-from dataclasses import dataclass
+from operator import attrgetter
+from typing import NamedTuple, Optional
 
 logger = logging.getLogger(__name__)
 
+_BY_TIME = attrgetter('time_seconds')
+
+# Output line templates (%-formatting is cheaper than f-strings for this shape)
+_T_TRANS = "[%ds] %s"
+_T_CHAT = "[%ds] 💬 CHAT: %s"
+
+# Transcript line: [123s] text (matched across the whole buffer, one line each)
+_TRANSCRIPT_RE = re.compile(r'^[ \t]*\[(\d+)s\][ \t]*(\S.*)$', re.MULTILINE)
+
+# Parsed results keyed on hash(text) -> (text, entries); retries re-merge the same inputs
+_PARSE_CACHE_SIZE = 16
+_CHAT_CACHE: dict[int, tuple[str, list["TimedEntry"]]] = {}
+_TRANSCRIPT_CACHE: dict[int, tuple[str, list["TimedEntry"]]] = {}
+
+
+def _cached_parse(cache: dict, text: str, parse) -> list["TimedEntry"]:
+    """Return parse(text), reusing the result of an earlier call with the same text."""
+    key = hash(text)
+    hit = cache.get(key)
+    if hit is not None and hit[0] == text:
+        return hit[1]
+    
+    entries = parse(text)
+    if len(cache) >= _PARSE_CACHE_SIZE:
+        # Evict oldest insertion
+        del cache[next(iter(cache))]
+    cache[key] = (text, entries)
+    return entries
 
-@dataclass
-class TimedEntry:
-    """Entry with timestamp for merging."""
-    time_seconds: float
-    text: str
-    entry_type: str  # "transcript" or "chat"
 
+class TimedEntry(NamedTuple):
+    """Entry with timestamp for merging."""
+    time_seconds: int
+    line: str  # Formatted output line, e.g. "[45s] 💬 CHAT: ..."
 
 
 def parse_chat_session(chat_text: str) -> list[TimedEntry]:
@@ -29,8 +56,14 @@ def parse_chat_session(chat_text: str) -> list[TimedEntry]:
         chat_text: JSON string from preprocess_chat_session
         
     Returns:
-        List of TimedEntry objects with parsed timestamps
+        List of TimedEntry objects with parsed timestamps, sorted by time
+        (cached and shared between calls - do not mutate)
     """
+    return _cached_parse(_CHAT_CACHE, chat_text, _parse_chat_session)
+
+
+def _parse_chat_session(chat_text: str) -> list[TimedEntry]:
+    """Uncached parser behind parse_chat_session."""
     import json
     
     entries = []
@@ -47,15 +80,14 @@ def parse_chat_session(chat_text: str) -> list[TimedEntry]:
                     # Parse time string to seconds
                     time_sec = parse_time_string_to_seconds(time_str)
                     if time_sec is not None:
-                        # Include name in the text
+                        # Include name in the text, mark with 💬 for visibility
                         text = f"{name}: {content}" if name else content
-                        entries.append(TimedEntry(
-                            time_seconds=time_sec,
-                            text=text,
-                            entry_type="chat"
-                        ))
+                        ts = int(time_sec)
+                        entries.append(TimedEntry(ts, _T_CHAT % (ts, text)))
             
             if entries:
+                # Keep sorted so it can be merged linearly with the transcript
+                entries.sort(key=_BY_TIME)
                 logger.info(f"Parsed {len(entries)} chat entries from JSON")
     except (json.JSONDecodeError, TypeError) as e:
         logger.error(f"Failed to parse chat JSON: {e}")
@@ -67,6 +99,18 @@ def parse_time_string_to_seconds(time_str: str) -> Optional[float]:
     """
     Parse time string like "1:23:45" or "23:45" to seconds.
     """
+    # Fast path for the common fixed shapes - slice directly, no split/list
+    n = len(time_str)
+    try:
+        if n in (4, 5) and time_str[-3] == ':':
+            # M:SS / MM:SS
+            return int(time_str[:-3]) * 60 + int(time_str[-2:])
+        if n in (7, 8) and time_str[-3] == ':' and time_str[-6] == ':':
+            # H:MM:SS / HH:MM:SS
+            return int(time_str[:-6]) * 3600 + int(time_str[-5:-3]) * 60 + int(time_str[-2:])
+    except ValueError:
+        pass  # Unusual content - let the general parser decide
+    
     parts = time_str.strip().split(':')
     try:
         if len(parts) == 3:
@@ -89,26 +133,17 @@ def parse_transcript_text(transcript_text: str) -> list[TimedEntry]:
         transcript_text: Transcript text with format "[123s] text"
         
     Returns:
-        List of TimedEntry objects
+        List of TimedEntry objects (cached and shared between calls - do not mutate)
     """
+    return _cached_parse(_TRANSCRIPT_CACHE, transcript_text, _parse_transcript_text)
+
+
+def _parse_transcript_text(transcript_text: str) -> list[TimedEntry]:
+    """Uncached parser behind parse_transcript_text."""
     entries = []
-    # Pattern: [123s] text
-    pattern = r'^\[(\d+)s\]\s*(.+)$'
-    
-    for line in transcript_text.strip().split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-            
-        match = re.match(pattern, line)
-        if match:
-            time_sec = int(match.group(1))
-            text = match.group(2).strip()
-            entries.append(TimedEntry(
-                time_seconds=time_sec,
-                text=text,
-                entry_type="transcript"
-            ))
+    for match in _TRANSCRIPT_RE.finditer(transcript_text):
+        ts = int(match.group(1))
+        entries.append(TimedEntry(ts, _T_TRANS % (ts, match.group(2).strip())))
     
     return entries
 
@@ -155,21 +190,8 @@ def merge_transcript_with_chat(
         # Couldn't parse transcript, return as-is with chat
         return f"{transcript_text}\n\n--- Chat Session ---\n{chat_text}"
     
-    # Merge all entries
-    all_entries = transcript_entries + chat_entries
-    
-    # Sort by timestamp
-    all_entries.sort(key=lambda e: e.time_seconds)
-    
-    # Format output
-    lines = []
-    for entry in all_entries:
-        ts = int(entry.time_seconds)
-        if entry.entry_type == "transcript":
-            lines.append(f"[{ts}s] {entry.text}")
-        else:
-            # Chat entry - mark with 💬 for visibility
-            lines.append(f"[{ts}s] 💬 CHAT: {entry.text}")
+    # Both lists are already in time order - linear two-way merge
+    merged = heapq.merge(transcript_entries, chat_entries, key=_BY_TIME)
     
     logger.info(f"Merged {len(transcript_entries)} transcript paragraphs with {len(chat_entries)} chat entries")
-    return "\n\n".join(lines)
+    return "\n\n".join(entry.line for entry in merged)
@@ -10,6 +10,7 @@ from typing import NamedTuple
 logger = logging.getLogger(__name__)
 
 MAX_PART_SIZE_MB = 380  # Leave buffer for 400MB limit
+FRAME_BATCH_SIZE = 8  # Max inputs (decoders) per ffmpeg frame extraction
 
 
 class VideoInfo(NamedTuple):
@@ -21,32 +22,44 @@ class VideoInfo(NamedTuple):
 
 async def get_video_info(video_path: str) -> VideoInfo:
     """Get video duration, size, and resolution"""
+    # One key=value per line (no wrappers) - order independent, no JSON decode
     cmd = [
         "ffprobe", "-v", "error",
         "-select_streams", "v:0",
         "-show_entries", "stream=width,height:format=duration,size",
-        "-of", "json",
+        "-of", "default=noprint_wrappers=1",
         video_path
     ]
     
     process = await asyncio.create_subprocess_exec(
         *cmd,
         stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
     )
     stdout, _ = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on {video_path} (exit {process.returncode})")
     
-    import json
-    data = json.loads(stdout.decode())
+    fields = {}
+    for line in stdout.decode(errors="replace").splitlines():
+        key, sep, value = line.partition("=")
+        if sep:
+            fields.setdefault(key.strip(), value.strip())
     
-    stream = data.get("streams", [{}])[0]
-    fmt = data.get("format", {})
+    def _num(key: str, cast):
+        try:
+            return cast(float(fields.get(key, 0)))
+        except ValueError:  # "N/A"
+            return cast(0)
+    
+    if "duration" not in fields:
+        raise RuntimeError(f"ffprobe reported no duration for {video_path}")
     
     return VideoInfo(
-        duration=float(fmt.get("duration", 0)),
-        size_bytes=int(fmt.get("size", 0)),
-        width=int(stream.get("width", 0)),
-        height=int(stream.get("height", 0)),
+        duration=_num("duration", float),
+        size_bytes=_num("size", int),
+        width=_num("width", int),
+        height=_num("height", int),
     )
 
 
@@ -106,41 +119,56 @@ async def split_video(
     info = await get_video_info(input_path)
     part_duration = info.duration / num_parts
     
-    parts = []
     base_name = os.path.splitext(os.path.basename(input_path))[0]
     
-    for i in range(num_parts):
+    # Stream-copy splits are I/O bound - run parts concurrently (bounded by CPU count)
+    sem = asyncio.Semaphore(min(num_parts, os.cpu_count() or 1))
+    
+    async def _run_split(i: int) -> dict:
         start = i * part_duration
         output_path = os.path.join(output_dir, f"{base_name}_part{i+1}.mp4")
         
         cmd = [
-            "ffmpeg", "-y",
+            "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-nostats",
             "-ss", str(start),
             "-i", input_path,
             "-t", str(part_duration),
             "-c", "copy",  # Fast copy, no re-encode
+            "-avoid_negative_ts", "make_zero",  # Shift timestamps at mux time, no extra pass
             output_path
         ]
         
-        logger.info(f"Splitting part {i+1}/{num_parts}: {start:.0f}s - {start+part_duration:.0f}s")
-        
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        await process.communicate()
+        async with sem:
+            logger.info(f"Splitting part {i+1}/{num_parts}: {start:.0f}s - {start+part_duration:.0f}s")
+            
+            # Output is never read - discard instead of buffering it
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await process.wait()
         
         if process.returncode != 0:
             raise RuntimeError(f"ffmpeg failed to split part {i+1}")
         
-        parts.append({
+        return {
             "path": output_path,
             "start_seconds": start,
             "duration": part_duration,
-        })
+        }
+    
+    results = await asyncio.gather(
+        *(_run_split(i) for i in range(num_parts)),
+        return_exceptions=True,
+    )
     
-    return parts
+    # Raise first failure (in part order) after all processes have finished
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    
+    return results
 
 
 async def extract_audio(video_path: str, output_dir: str = "/tmp") -> str:
@@ -158,7 +186,7 @@ async def extract_audio(video_path: str, output_dir: str = "/tmp") -> str:
     output_path = os.path.join(output_dir, f"{base_name}_audio.mp3")
     
     cmd = [
-        "ffmpeg", "-y",
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-nostats",  # stderr holds errors only
         "-i", video_path,
         "-vn",  # No video
         "-acodec", "libmp3lame",
@@ -205,35 +233,108 @@ async def extract_frame(video_path: str, seconds: int, output_dir: str = "/tmp")
     output_path = os.path.join(output_dir, frame_filename)
     
     cmd = [
-        "ffmpeg", "-y",
-        "-ss", str(seconds),
+        "ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-nostats",
+        "-threads", "1",  # One frame - a single decoder thread avoids per-thread frame buffers
+        "-ss", str(seconds),  # Input seek (before -i) - jumps by keyframe index
         "-i", video_path,
-        "-vframes", "1",
+        "-frames:v", "1",
+        "-an", "-sn", "-dn",  # Video only - skip audio/subtitle/data streams
         "-q:v", "2",  # High quality JPEG
         output_path
     ]
     
     process = await asyncio.create_subprocess_exec(
         *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
     )
-    _, stderr = await process.communicate()
+    await process.wait()
     
     if process.returncode != 0:
-        logger.warning(f"Failed to extract frame at {seconds}s: {stderr.decode()}")
+        logger.warning(f"Failed to extract frame at {seconds}s (ffmpeg exit {process.returncode})")
         return None
     
     logger.info(f"Extracted frame at {seconds}s: {output_path}")
     return output_path
 
 
-def cleanup_files(paths: list[str]) -> None:
-    """Delete temporary files"""
-    for path in paths:
-        try:
-            if os.path.exists(path):
-                os.remove(path)
-                logger.info(f"Deleted: {path}")
-        except Exception as e:
-            logger.warning(f"Failed to delete {path}: {e}")
+async def _extract_frame_group(video_path: str, seconds: list[int], output_paths: dict[int, str]) -> None:
+    """Extract one group of frames with a single ffmpeg process (single-threaded decoders)."""
+    cmd = ["ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-nostats"]
+    for sec in seconds:
+        cmd += ["-threads", "1", "-ss", str(sec), "-i", video_path]
+    for idx, sec in enumerate(seconds):
+        cmd += [
+            "-map", f"{idx}:v:0",
+            "-frames:v", "1",
+            "-q:v", "2",  # High quality JPEG
+            output_paths[sec],
+        ]
+    
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    
+    if process.returncode != 0:
+        logger.warning(f"Batch frame extraction failed, retrying missing frames: {stderr.decode()[-500:]}")
+
+
+async def extract_frames_batch(
+    video_path: str,
+    seconds_list: list[int],
+    output_dir: str = "/tmp",
+) -> dict[int, str]:
+    """
+    Extract frames at several timestamps, FRAME_BATCH_SIZE per ffmpeg process.
+    Each timestamp is a separate fast-seeked input mapped to its own output.
+    Frames the batch could not produce are retried with extract_frame.
+    
+    Returns:
+        Dict of seconds -> frame image path (missing if extraction failed)
+    """
+    import uuid
+    
+    unique_seconds = list(dict.fromkeys(seconds_list))
+    if not unique_seconds:
+        return {}
+    
+    batch_id = uuid.uuid4().hex[:8]
+    output_paths = {
+        sec: os.path.join(output_dir, f"frame_{sec}s_{batch_id}.jpg")
+        for sec in unique_seconds
+    }
+    
+    # Bounded batches: every input is its own demuxer + decoder in the ffmpeg process
+    for start in range(0, len(unique_seconds), FRAME_BATCH_SIZE):
+        await _extract_frame_group(video_path, unique_seconds[start:start + FRAME_BATCH_SIZE], output_paths)
+    
+    frames = {}
+    for sec, path in output_paths.items():
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            frames[sec] = path
+        else:
+            single = await extract_frame(video_path, sec, output_dir)
+            if single:
+                frames[sec] = single
+    
+    logger.info(f"Extracted {len(frames)}/{len(unique_seconds)} frames in batches of {FRAME_BATCH_SIZE}")
+    return frames
+
+
+def _remove_file(path: str) -> None:
+    """Delete a single file, ignoring already-missing files"""
+    try:
+        os.unlink(path)
+        logger.info(f"Deleted: {path}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Failed to delete {path}: {e}")
+
+
+async def cleanup_files(paths: list[str]) -> None:
+    """Delete temporary files (in thread pool to avoid blocking event loop)"""
+    await asyncio.gather(*(asyncio.to_thread(_remove_file, path) for path in paths))
@@ -4,34 +4,55 @@ Discord Utilities
 
 import asyncio
 import re
-from typing import Union
+from typing import Iterator, Union
 
 import discord
 
+from utils.table_utils import cleanup_table_images
 
-def suppress_url_embeds(text: str) -> str:
+
+def _split_chunks(text: str, chunk_size: int) -> Iterator[str]:
     """
-    Wrap URLs in angle brackets to suppress Discord's auto-embed previews.
-    
-    https://example.com → <https://example.com>
-    Already wrapped URLs are left unchanged.
+    Split text into chunks of at most chunk_size chars, breaking at newlines.
+    Single pass over the string - chunks are slices, no line list or concatenation.
+    Lines longer than chunk_size are hard-split.
+    A ``` code block that would straddle two chunks starts the next chunk instead
+    (unless it is too long for one chunk anyway).
     """
-    # Pattern to match URLs not already wrapped in < >
-    # Negative lookbehind for < and negative lookahead for >
-    url_pattern = r'(?<![<\(])(https?://[^\s\)<>]+)(?![>\)])'
-    
-    def wrap_url(match):
-        url = match.group(1)
-        return f'<{url}>'
+    pos = 0
+    n = len(text)
+    in_block = 0  # 1 if the current position is inside a ``` block
     
-    return re.sub(url_pattern, wrap_url, text)
+    while pos < n:
+        if n - pos <= chunk_size:
+            yield text[pos:]
+            return
+        
+        # Last newline that keeps the chunk within chunk_size
+        cut = text.rfind('\n', pos, pos + chunk_size + 1)
+        if cut == -1:
+            # No newline in range - hard split the long line
+            end = pos + chunk_size
+        else:
+            # Chunk would end inside a block opened in it - break before the opening fence's line
+            if (in_block + text.count('```', pos, cut)) % 2:
+                fence = text.rfind('```', pos, cut)
+                line_start = text.rfind('\n', pos, fence) if fence != -1 else -1
+                if line_start != -1:
+                    cut = line_start
+            end = cut
+        
+        yield text[pos:end]
+        in_block = (in_block + text.count('```', pos, end)) % 2
+        pos = end if cut == -1 else end + 1
 
 
 async def send_chunked(
     target: Union[discord.Interaction, discord.TextChannel],
     text: str,
     chunk_size: int = 1900,  # Slightly less than 2000 for safety
-    suppress_embeds: bool = True,  # Wrap URLs to prevent Discord embeds
+    suppress_embeds: bool = True,  # Send with SUPPRESS_EMBEDS flag to prevent Discord embeds
+    rate_limit_delay: float = 0.5,  # Pause between chunks (0 = rely on discord.py rate limiter)
 ) -> list[discord.Message]:
     """
     Send a long message in chunks to avoid Discord's 2000 char limit.
@@ -39,43 +60,8 @@ async def send_chunked(
     """
     if not text:
         return []
-    
-    # Suppress URL embeds if enabled
-    if suppress_embeds:
-        text = suppress_url_embeds(text)
 
-    chunks = []
-    current_chunk = ""
-    
-    # split by lines to avoid cutting sentences
-    lines = text.split('\n')
-    
-    for line in lines:
-        # If line itself is too long, we must split it by chars
-        if len(line) > chunk_size:
-            # If we have content pending, flush it first
-            if current_chunk:
-                chunks.append(current_chunk)
-                current_chunk = ""
-            
-            # Split long line
-            for i in range(0, len(line), chunk_size):
-                chunks.append(line[i : i + chunk_size])
-            continue
-            
-        # Check if adding this line would exceed chunk size
-        # +1 for newline character that was stripped by split
-        if len(current_chunk) + len(line) + 1 > chunk_size:
-            chunks.append(current_chunk)
-            current_chunk = line
-        else:
-            if current_chunk:
-                current_chunk += "\n" + line
-            else:
-                current_chunk = line
-    
-    if current_chunk:
-        chunks.append(current_chunk)
+    chunks = list(_split_chunks(text, chunk_size))
 
     sent_messages = []
     
@@ -85,19 +71,19 @@ async def send_chunked(
             
         if isinstance(target, discord.Interaction):
             if i == 0 and not target.response.is_done():
-                await target.response.send_message(chunk)
+                await target.response.send_message(chunk, suppress_embeds=suppress_embeds)
                 msg = await target.original_response()
                 sent_messages.append(msg)
             else:
-                msg = await target.followup.send(chunk)
+                msg = await target.followup.send(chunk, suppress_embeds=suppress_embeds)
                 sent_messages.append(msg)
         else:
-            msg = await target.send(chunk)
+            msg = await target.send(chunk, suppress_embeds=suppress_embeds)
             sent_messages.append(msg)
 
         # Rate limit protection
-        if i < len(chunks) - 1:
-            await asyncio.sleep(0.5)
+        if rate_limit_delay and i < len(chunks) - 1:
+            await asyncio.sleep(rate_limit_delay)
             
     return sent_messages
 
@@ -120,9 +106,12 @@ async def send_chunked_with_frames(
     Returns:
         tuple[list[str], list[discord.Message]]: (frame_paths, sent_messages)
     """
-    from services.video import extract_frame
+    from services.video import extract_frames_batch
     
-    frame_paths = []
+    # Extract all referenced frames up front with one ffmpeg process
+    frame_seconds_list = [sec for _, sec in parts if sec is not None]
+    frames = await extract_frames_batch(video_path, frame_seconds_list)
+    frame_paths = list(frames.values())
     sent_messages = []
     
     for text, frame_seconds in parts:
@@ -131,11 +120,10 @@ async def send_chunked_with_frames(
             msgs = await send_chunked(channel, text, chunk_size)
             sent_messages.extend(msgs)
         
-        # Extract and send frame if specified
+        # Send frame if specified
         if frame_seconds is not None:
-            frame_path = await extract_frame(video_path, frame_seconds)
+            frame_path = frames.get(frame_seconds)
             if frame_path:
-                frame_paths.append(frame_path)
                 try:
                     file = discord.File(frame_path)
                     msg = await channel.send(file=file)
@@ -173,39 +161,31 @@ async def send_chunked_with_pages(
     # Build a lookup dict for LaTeX images
     latex_lookup = {placeholder: path for placeholder, path in (latex_images or [])}
     
-    # Collect all messages sent
-    sent_messages = []
+    # One alternation over all placeholders (longest first) - text is scanned once
+    latex_re = re.compile(
+        "|".join(re.escape(p) for p in sorted(latex_lookup, key=len, reverse=True))
+    ) if latex_lookup else None
+    
+    # Build the full send plan first: ("text", content) or ("file", path, filename, caption)
+    plan = []
 
-    async def send_text_with_latex(text: str):
-        """Send text, replacing any LaTeX placeholders with images"""
-        if not latex_lookup:
-            msgs = await send_chunked(channel, text, chunk_size)
-            sent_messages.extend(msgs)
+    def add_text_with_latex(text: str):
+        """Queue text, replacing any LaTeX placeholders with images"""
+        if latex_re is None:
+            plan.append(("text", text))
             return
         
-        remaining = text
-        for placeholder, img_path in (latex_images or []):
-            if placeholder in remaining:
-                parts_split = remaining.split(placeholder, 1)
-                if parts_split[0].strip():
-                    msgs = await send_chunked(channel, parts_split[0], chunk_size)
-                    sent_messages.extend(msgs)
-                
-                # Send LaTeX image
-                if os.path.exists(img_path):
-                    try:
-                        file = discord.File(img_path, filename="formula.png")
-                        msg = await channel.send(file=file)
-                        sent_messages.append(msg)
-                        await asyncio.sleep(0.3)
-                    except Exception as e:
-                        logger.warning(f"Failed to send LaTeX image: {e}")
-                
-                remaining = parts_split[1] if len(parts_split) > 1 else ""
+        last = 0
+        for match in latex_re.finditer(text):
+            before = text[last:match.start()]
+            if before.strip():
+                plan.append(("text", before))
+            plan.append(("file", latex_lookup[match.group()], "formula.png", None))
+            last = match.end()
         
+        remaining = text[last:]
         if remaining.strip():
-            msgs = await send_chunked(channel, remaining, chunk_size)
-            sent_messages.extend(msgs)
+            plan.append(("text", remaining))
     
     for part in parts:
         # Handle both old (text, page_num) and new (text, page_num, desc) formats
@@ -215,33 +195,40 @@ async def send_chunked_with_pages(
         else:
             text, page_num, description = part
         
-        # Send text chunk(s) with LaTeX images
+        # Text chunk(s) with LaTeX images
         if text.strip():
-            await send_text_with_latex(text)
+            add_text_with_latex(text)
         
-        # Send slide image if specified
+        # Slide image if specified
         if page_num is not None and slide_images:
             image_path = get_page_image(slide_images, page_num)
             if image_path:
-                try:
-                    file = discord.File(image_path, filename=f"slide_{page_num}.jpg")
-                    # Include description in caption if available
-                    if description:
-                        caption = f"📄 **Slide {page_num}**\n*({description})*"
-                    else:
-                        caption = f"📄 **Slide {page_num}**"
-                    msg = await channel.send(caption, file=file)
-                    sent_messages.append(msg)
-                    await asyncio.sleep(0.5)  # Rate limit
-                except Exception as e:
-                    logger.warning(f"Failed to send slide {page_num}: {e}")
-    
-    # Cleanup LaTeX images after sending
-    for _, img_path in (latex_images or []):
+                # Include description in caption if available
+                if description:
+                    caption = f"📄 **Slide {page_num}**\n*({description})*"
+                else:
+                    caption = f"📄 **Slide {page_num}**"
+                plan.append(("file", image_path, f"slide_{page_num}.jpg", caption))
+    
+    # Send in order (interleaving matters) - no fixed sleeps,
+    # discord.py's rate limiter waits on the channel bucket / 429s itself
+    sent_messages = []
+    for item in plan:
+        if item[0] == "text":
+            msgs = await send_chunked(channel, item[1], chunk_size, rate_limit_delay=0)
+            sent_messages.extend(msgs)
+            continue
+        
+        _, path, filename, caption = item
+        if not os.path.exists(path):
+            continue
         try:
-            if os.path.exists(img_path):
-                os.remove(img_path)
-        except Exception:
-            pass
+            msg = await channel.send(caption, file=discord.File(path, filename=filename))
+            sent_messages.append(msg)
+        except Exception as e:
+            logger.warning(f"Failed to send {filename}: {e}")
+    
+    # Cleanup LaTeX/table images after sending (cached table renders are kept)
+    cleanup_table_images(latex_images or [])
             
     return sent_messages
@@ -2,12 +2,28 @@
 Drive File Validation Utilities
 Check file types from Google Drive using magic bytes (first 1KB)
 """
+import re
 import logging
 import httpx
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
+# Shared client for Drive checks - keeps TCP/TLS connections alive across calls
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get (or lazily create) the shared Drive HTTP client."""
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
+    return _CLIENT
+
+
 # Magic bytes signatures for common file types
 MAGIC_BYTES = {
     "pdf": [b"%PDF-"],
@@ -16,7 +32,6 @@ MAGIC_BYTES = {
         b"\x00\x00\x00\x1cftyp",  # MP4 variant
         b"\x00\x00\x00\x20ftyp",  # MP4 variant
         b"\x1aE\xdf\xa3",         # MKV/WebM
-        b"RIFF",                   # AVI
         b"\x00\x00\x01\xba",       # MPEG
         b"\x00\x00\x01\xb3",       # MPEG
     ],
@@ -24,7 +39,6 @@ MAGIC_BYTES = {
         b"\x89PNG",                # PNG
         b"\xff\xd8\xff",           # JPEG
         b"GIF8",                   # GIF
-        b"RIFF",                   # WebP (RIFF container)
     ],
     "html": [
         b"<!DOCTYPE",
@@ -33,6 +47,29 @@ MAGIC_BYTES = {
     ],
 }
 
+# RIFF containers (AVI, WebP, WAV) share a prefix - subtype is at offset 8
+RIFF_SUBTYPES = {
+    b"AVI ": "video",
+    b"WEBP": "image",
+}
+
+# (file_type, prefixes) pairs - bytes.startswith tests a whole tuple in C
+_SIG_MAP = [(file_type, tuple(signatures)) for file_type, signatures in MAGIC_BYTES.items()]
+
+# Google Drive file ID in share/download URLs
+_DRIVE_ID_RES = [
+    re.compile(r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)'),
+    re.compile(r'drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)'),
+    re.compile(r'docs\.google\.com/.*?/d/([a-zA-Z0-9_-]+)'),
+    re.compile(r'drive\.google\.com/uc\?.*?id=([a-zA-Z0-9_-]+)'),
+]
+
+# Virus-scan confirmation token in Drive's interstitial HTML
+_CONFIRM_RE = re.compile(rb'confirm=([0-9A-Za-z_-]+)')
+
+# Bytes needed for magic-byte detection
+HEAD_SIZE = 1024
+
 
 def detect_file_type(data: bytes) -> str:
     """
@@ -44,35 +81,49 @@ def detect_file_type(data: bytes) -> str:
     Returns:
         File type: "pdf", "video", "image", "html", or "unknown"
     """
-    for file_type, signatures in MAGIC_BYTES.items():
-        for sig in signatures:
-            if data.startswith(sig):
-                return file_type
+    if data[:4] == b"RIFF":
+        return RIFF_SUBTYPES.get(data[8:12], "unknown")
+    
+    for file_type, signatures in _SIG_MAP:
+        if data.startswith(signatures):
+            return file_type
     return "unknown"
 
 
 def extract_drive_file_id(url: str) -> Optional[str]:
     """Extract Google Drive file ID from various URL formats"""
-    import re
-    
-    patterns = [
-        r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)',
-        r'drive\.google\.com/open\?id=([a-zA-Z0-9_-]+)',
-        r'docs\.google\.com/.*?/d/([a-zA-Z0-9_-]+)',
-        r'drive\.google\.com/uc\?.*?id=([a-zA-Z0-9_-]+)',
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    for pattern in _DRIVE_ID_RES:
+        match = pattern.search(url)
         if match:
             return match.group(1)
     return None
 
 
+async def _read_head(client: httpx.AsyncClient, url: str, timeout: int) -> tuple[int, bytes]:
+    """
+    Stream a URL and return (status_code, first HEAD_SIZE bytes).
+    Closes the stream early, so servers ignoring Range don't send the whole file.
+    """
+    async with client.stream(
+        "GET",
+        url,
+        headers={"Range": f"bytes=0-{HEAD_SIZE - 1}"},
+        timeout=timeout,
+    ) as resp:
+        head = b""
+        if resp.status_code in (200, 206):
+            async for chunk in resp.aiter_bytes():
+                head += chunk
+                if len(head) >= HEAD_SIZE:
+                    break
+        return resp.status_code, head[:HEAD_SIZE]
+
+
 async def validate_drive_file(
     url: str, 
     expected_type: str = None,
     timeout: int = 15,
+    client: Optional[httpx.AsyncClient] = None,
 ) -> tuple[bool, str, str]:
     """
     Validate a Google Drive file by checking magic bytes (first 1KB).
@@ -83,6 +134,7 @@ async def validate_drive_file(
         url: Google Drive share link or download URL
         expected_type: Expected file type ("pdf", "video", "image") or None for auto-detect
         timeout: Request timeout in seconds
+        client: Optional HTTP client (defaults to the shared module client)
         
     Returns:
         Tuple of (is_valid, detected_type, download_url)
@@ -98,58 +150,54 @@ async def validate_drive_file(
     
     download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
     
+    client = client or _get_client()
+    
     try:
-        async with httpx.AsyncClient(follow_redirects=True, timeout=timeout) as client:
-            # Download first 1KB using Range header
-            resp = await client.get(
-                download_url,
-                headers={"Range": "bytes=0-1023"}
-            )
-            
-            if resp.status_code not in (200, 206):
-                logger.warning(f"Drive file check failed: status {resp.status_code}")
-                return False, "error", download_url
-            
-            first_bytes = resp.content
-            detected_type = detect_file_type(first_bytes)
+        # Read first 1KB only (Range + early stream close)
+        status_code, first_bytes = await _read_head(client, download_url, timeout)
+        
+        if status_code not in (200, 206):
+            logger.warning(f"Drive file check failed: status {status_code}")
+            return False, "error", download_url
+        
+        detected_type = detect_file_type(first_bytes)
+        
+        # If HTML, check if it's virus scan confirmation or access denied
+        if detected_type == "html":
+            html_text = first_bytes.decode('utf-8', errors='ignore')
             
-            # If HTML, check if it's virus scan confirmation or access denied
-            if detected_type == "html":
-                html_text = first_bytes.decode('utf-8', errors='ignore')
+            # Check for virus scan confirmation form
+            if 'confirm=' in html_text or 'download' in html_text.lower():
+                # Use the token from the page if present, else Drive's generic "t"
+                token_match = _CONFIRM_RE.search(first_bytes)
+                token = token_match.group(1).decode() if token_match else "t"
+                confirmed_url = f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm={token}"
                 
-                # Check for virus scan confirmation form
-                if 'confirm=' in html_text or 'download' in html_text.lower():
-                    # Try the confirmed download URL
-                    confirmed_url = f"https://drive.usercontent.google.com/download?id={file_id}&export=download&confirm=t"
-                    
-                    # Re-check with confirmed URL
-                    resp2 = await client.get(
-                        confirmed_url,
-                        headers={"Range": "bytes=0-1023"}
-                    )
-                    
-                    if resp2.status_code in (200, 206):
-                        first_bytes = resp2.content
-                        detected_type = detect_file_type(first_bytes)
-                        download_url = confirmed_url
-                        logger.info(f"Used confirmed URL, detected: {detected_type}")
+                # Re-check with confirmed URL
+                status_code2, head2 = await _read_head(client, confirmed_url, timeout)
                 
-                # Still HTML = access denied or invalid link
-                if detected_type == "html":
-                    logger.warning("Drive file returned HTML - access denied or invalid")
-                    return False, "access_denied", download_url
-            
-            logger.info(f"Drive file validation: {detected_type} (first bytes: {first_bytes[:10]})")
-            
-            # Check against expected type
-            if expected_type:
-                is_valid = detected_type == expected_type
-            else:
-                # Any recognized type except html is valid
-                is_valid = detected_type not in ("html", "unknown", "access_denied")
-            
-            return is_valid, detected_type, download_url
+                if status_code2 in (200, 206):
+                    first_bytes = head2
+                    detected_type = detect_file_type(first_bytes)
+                    download_url = confirmed_url
+                    logger.info(f"Used confirmed URL, detected: {detected_type}")
             
+            # Still HTML = access denied or invalid link
+            if detected_type == "html":
+                logger.warning("Drive file returned HTML - access denied or invalid")
+                return False, "access_denied", download_url
+        
+        logger.info(f"Drive file validation: {detected_type} (first bytes: {first_bytes[:10]})")
+        
+        # Check against expected type
+        if expected_type:
+            is_valid = detected_type == expected_type
+        else:
+            # Any recognized type except html is valid
+            is_valid = detected_type not in ("html", "unknown", "access_denied")
+        
+        return is_valid, detected_type, download_url
+        
     except Exception as e:
         logger.warning(f"Drive file validation failed: {e}")
         return False, "error", download_url
@@ -5,45 +5,325 @@ Convert Markdown tables to images for Discord display.
 Discord doesn't render Markdown tables, so we render them as images.
 """
 
+import asyncio
+import functools
 import logging
 import os
 import re
 import hashlib
-import textwrap
+import io
+import itertools
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Optional
 
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-
 logger = logging.getLogger(__name__)
 
+# Header/body separator line (|---|:---:|)
+_SEP_RE = re.compile(r'^[\s|:-]+$')
+
+# Whitespace runs, collapsed before wrapping so equivalent cells share a cache entry
+_WS_RE = re.compile(r'\s+')
+
+# Rendered tables: hash -> image path (LRU, files stay on disk while cached)
+_RENDER_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_MAX_CACHE = 256
+
+# Discord-like dark theme
+_HEADER_BG = '#202225'
+_BODY_BG = '#2f3136'
+_EDGE = '#4f545c'
+_HEADER_FG = '#ffffff'
+_BODY_FG = '#dcddde'
+
+# Opaque by default: matches Discord's dark theme, and RGB PNGs encode faster and
+# smaller than RGBA. Set TABLE_TRANSPARENT=1 for transparent backgrounds.
+_TRANSPARENT_DEFAULT = os.getenv("TABLE_TRANSPARENT", "").lower() in ("1", "true", "yes")
+
+# Cell font size in pixels at 100 dpi (DejaVu Sans covers Vietnamese diacritics)
+_FONT_PX = 14
+
+# Tables up to this size are sent as a monospace code block instead of an image
+# (at most ~1.7KB, so send_chunked can always keep the whole block in one message)
+_TEXT_TABLE_MAX_WIDTH = 80
+_TEXT_TABLE_MAX_LINES = 20
+
+# Thread pool for table renders (drawing + PNG encode) off the event loop
+_RENDER_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tbl-render")
+
+# Per-thread font objects (created on first use) - FreeType fonts are never shared
+_local = threading.local()
+
+
+def _fast_wrap(text: str, width: int) -> str:
+    """
+    Greedy word wrap for table cells: whitespace-separated words,
+    words longer than width are hard-broken. No regex tokenizer like textwrap.
+    """
+    # Short single-line cell - nothing to wrap
+    if len(text) <= width and text.isprintable():
+        return text
+    
+    lines = []
+    cur = []
+    cur_len = 0
+    
+    for word in text.split():
+        if len(word) > width:
+            if cur:
+                lines.append(' '.join(cur))
+                cur = []
+            while len(word) > width:
+                lines.append(word[:width])
+                word = word[width:]
+            cur = [word]
+            cur_len = len(word)
+        elif not cur:
+            cur = [word]
+            cur_len = len(word)
+        elif cur_len + 1 + len(word) > width:
+            lines.append(' '.join(cur))
+            cur = [word]
+            cur_len = len(word)
+        else:
+            cur.append(word)
+            cur_len += 1 + len(word)
+    
+    if cur:
+        lines.append(' '.join(cur))
+    
+    return '\n'.join(lines)
+
+
+def _norm(text: str) -> str:
+    """Strip and collapse whitespace runs to single spaces (regex only when needed)."""
+    text = text.strip()
+    if '  ' in text or not text.isprintable():
+        return _WS_RE.sub(' ', text)
+    return text
+
+
+@lru_cache(maxsize=8192)
+def _wrap_cached(norm_text: str, width: int) -> str:
+    """Wrap normalized text, memoized on (text, width) - cells ("Yes", numbers, dates) repeat a lot."""
+    return _fast_wrap(norm_text, width)
+
 
 def wrap_text(text: str, width: int = 35) -> str:
     """Wrap text to specified character width."""
-    return '\n'.join(textwrap.wrap(text, width=width))
+    return _wrap_cached(_norm(text), width)
 
 
-def calculate_column_widths(headers: list[str], rows: list[list[str]], wrap_width: int = 35) -> list[float]:
-    """Calculate column widths based on content length."""
-    n_cols = len(headers)
-    col_lengths = []
+def _wants_jpeg(output_path: str, transparent: bool) -> bool:
+    """Opaque tables saved to a .jpg/.jpeg path are encoded as JPEG."""
+    return not transparent and output_path.lower().endswith(('.jpg', '.jpeg'))
+
+
+def _encode_image(image, jpeg: bool, compress_level: int) -> bytes:
+    """Encode a rendered table in memory: PNG (RGBA if transparent), or JPEG."""
+    buf = io.BytesIO()
+    if jpeg:
+        image.convert("RGB").save(buf, "JPEG", quality=85)
+    else:
+        image.save(buf, "PNG", compress_level=compress_level)
+    return buf.getvalue()
+
+
+def _write_file(path: str, data: bytes):
+    """Write encoded image bytes with a single open + write loop + close."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def _draw_pillow(
+    headers: list[str],
+    wrapped_rows: list[list[str]],
+    max_lines_per_row: list[int],
+    transparent: bool,
+    dpi: int,
+    font,
+    bold_font,
+):
+    """Draw the table directly with Pillow: measure text, fill cells, draw the grid once."""
+    from PIL import Image, ImageDraw
+    
+    scale = dpi / 100
+    pad_x = round(10 * scale)
+    pad_y = round(6 * scale)
+    spacing = round(4 * scale)
+    margin = round(10 * scale)
+    border = max(1, round(2 * scale))
+    ascent, descent = font.getmetrics()
+    line_h = ascent + descent
+    
+    # Column widths in pixels from the widest line in each column
+    col_px = [bold_font.getlength(h) for h in headers]
+    for row in wrapped_rows:
+        for j, cell in enumerate(row):
+            for line in cell.split('\n'):
+                width = font.getlength(line)
+                if width > col_px[j]:
+                    col_px[j] = width
+    col_px = [int(width + 0.999) + 2 * pad_x for width in col_px]
+    row_px = [line_h + 2 * pad_y] + [
+        lines * line_h + (lines - 1) * spacing + 2 * pad_y for lines in max_lines_per_row
+    ]
+    
+    xs = list(itertools.accumulate(col_px, initial=margin))
+    ys = list(itertools.accumulate(row_px, initial=margin))
+    size = (xs[-1] + margin, ys[-1] + margin)
+    
+    if transparent:
+        image = Image.new("RGBA", size, (0, 0, 0, 0))
+    else:
+        image = Image.new("RGB", size, _BODY_BG)
+    draw = ImageDraw.Draw(image)
+    
+    # Header row + body rows: fill, then centred text
+    all_rows = [headers] + wrapped_rows
+    for i, row in enumerate(all_rows):
+        is_header = i == 0
+        draw.rectangle((xs[0], ys[i], xs[-1], ys[i + 1]), fill=_HEADER_BG if is_header else _BODY_BG)
+        for j, cell in enumerate(row):
+            if not cell:
+                continue
+            draw.multiline_text(
+                ((xs[j] + xs[j + 1]) / 2, (ys[i] + ys[i + 1]) / 2),
+                cell,
+                fill=_HEADER_FG if is_header else _BODY_FG,
+                font=bold_font if is_header else font,
+                anchor="mm",
+                align="center",
+                spacing=spacing,
+            )
     
-    for col_idx in range(n_cols):
-        # Header length
-        max_len = len(headers[col_idx])
-        # Content length
-        for row in rows:
-            wrapped = wrap_text(row[col_idx], wrap_width)
-            for line in wrapped.split('\n'):
-                max_len = max(max_len, len(line))
-        col_lengths.append(max_len)
+    # Grid lines
+    for x in xs:
+        draw.line((x, ys[0], x, ys[-1]), fill=_EDGE, width=border)
+    for y in ys:
+        draw.line((xs[0], y, xs[-1], y), fill=_EDGE, width=border)
     
-    # Normalize to proportions (sum = 1)
-    total = sum(col_lengths)
-    col_widths = [length / total for length in col_lengths]
+    return image
+
+
+@lru_cache(maxsize=1)
+def _font_files() -> Optional[tuple[str, str]]:
+    """Locate DejaVu Sans regular/bold: system fonts first, then matplotlib's bundled copy."""
+    from PIL import ImageFont
+    
+    # Pillow searches the system font directories for bare file names
+    candidates = [("DejaVuSans.ttf", "DejaVuSans-Bold.ttf")]
+    try:
+        import matplotlib  # Installed for latex_utils - ships DejaVu Sans
+        ttf_dir = os.path.join(matplotlib.get_data_path(), "fonts", "ttf")
+        candidates.append((os.path.join(ttf_dir, "DejaVuSans.ttf"), os.path.join(ttf_dir, "DejaVuSans-Bold.ttf")))
+    except ImportError:
+        pass
+    
+    for regular, bold in candidates:
+        try:
+            ImageFont.truetype(regular, 10)
+            ImageFont.truetype(bold, 10)
+            return regular, bold
+        except OSError:
+            continue
+        except ImportError:
+            logger.warning("Pillow was built without FreeType - tables will not be rendered")
+            return None
+    
+    logger.warning("DejaVu Sans not found - tables will not be rendered")
+    return None
+
+
+def _get_fonts(size: int):
+    """This thread's (regular, bold) fonts at a pixel size, or None if no font file is available."""
+    files = _font_files()
+    if files is None:
+        return None
     
-    return col_widths
+    fonts = getattr(_local, "fonts", None)
+    if fonts is None:
+        fonts = _local.fonts = {}
+    if size not in fonts:
+        from PIL import ImageFont
+        fonts[size] = (ImageFont.truetype(files[0], size), ImageFont.truetype(files[1], size))
+    return fonts[size]
+
+
+def _wrap_rows(rows: list[list[str]], wrap_width: int) -> tuple[list[list[str]], list[int]]:
+    """
+    Single pass over cells: wrap once, count lines per row.
+    The wrapped rows are shared by sizing and drawing - nothing wraps again.
+    
+    Returns:
+        Tuple of (wrapped_rows, max_lines_per_row)
+    """
+    wrapped_rows = []
+    max_lines_per_row = []
+    
+    for row in rows:
+        wrapped_row = [_wrap_cached(_norm(cell), wrap_width) for cell in row]
+        wrapped_rows.append(wrapped_row)
+        max_lines_per_row.append(max(cell.count('\n') for cell in wrapped_row) + 1)
+    
+    return wrapped_rows, max_lines_per_row
+
+
+def _render_bytes(
+    headers: list[str],
+    rows: list[list[str]],
+    wrap_width: int,
+    transparent: bool,
+    dpi: int,
+    compress_level: int,
+    jpeg: bool,
+) -> Optional[bytes]:
+    """Render a table to encoded image bytes, or None if no font is available."""
+    fonts = _get_fonts(round(_FONT_PX * dpi / 100))
+    if not fonts:
+        return None
+    
+    wrapped_rows, max_lines_per_row = _wrap_rows(rows, wrap_width)
+    image = _draw_pillow(headers, wrapped_rows, max_lines_per_row, transparent, dpi, *fonts)
+    return _encode_image(image, jpeg, compress_level)
+
+
+def render_table_to_image_bytes(
+    headers: list[str],
+    rows: list[list[str]],
+    wrap_width: int = 35,
+    transparent: bool = _TRANSPARENT_DEFAULT,
+    dpi: int = 100,
+    compress_level: int = 1,
+    jpeg: bool = False,
+) -> Optional[bytes]:
+    """
+    Render a table to in-memory image bytes (no file), e.g. for
+    discord.File(io.BytesIO(data), filename="table.png").
+    
+    Args:
+        jpeg: Encode as JPEG instead of PNG (ignored if transparent)
+        
+    Returns:
+        PNG/JPEG bytes, or None if rendering failed
+    """
+    try:
+        return _render_bytes(
+            headers, rows, wrap_width, transparent, dpi, compress_level,
+            jpeg and not transparent,
+        )
+    except Exception as e:
+        logger.error(f"Failed to render table: {e}")
+        return None
 
 
 def render_table_to_image(
@@ -51,7 +331,9 @@ def render_table_to_image(
     rows: list[list[str]], 
     output_path: str,
     wrap_width: int = 35,
-    transparent: bool = True
+    transparent: bool = _TRANSPARENT_DEFAULT,
+    dpi: int = 100,
+    compress_level: int = 1,
 ) -> bool:
     """
     Render a table to an image file.
@@ -59,76 +341,24 @@ def render_table_to_image(
     Args:
         headers: List of column headers
         rows: List of rows, each row is a list of cell values
-        output_path: Path to save the output image
+        output_path: Path to save the output image (.png, or .jpg for opaque tables)
         wrap_width: Character width for text wrapping
         transparent: Whether to use transparent background
+        dpi: Output resolution (100 is plenty at Discord's display size)
+        compress_level: PNG zlib level (1 = fast; flat-colour tables barely shrink at higher levels)
         
     Returns:
         True if successful, False otherwise
     """
     try:
-        # Wrap text in cells
-        wrapped_rows = []
-        max_lines_per_row = []
-        
-        for row in rows:
-            wrapped_row = [wrap_text(cell, wrap_width) for cell in row]
-            wrapped_rows.append(wrapped_row)
-            max_lines = max(cell.count('\n') + 1 for cell in wrapped_row)
-            max_lines_per_row.append(max_lines)
-        
-        # Dynamic figure size
-        base_height = 1.5
-        row_height_factor = 0.35
-        total_height = base_height + sum(lines * row_height_factor for lines in max_lines_per_row)
-        fig_width = max(12, len(headers) * 4)
-        
-        fig, ax = plt.subplots(figsize=(fig_width, total_height))
-        ax.axis('off')
-        
-        # Dynamic column widths
-        col_widths = calculate_column_widths(headers, rows, wrap_width)
-        
-        table = ax.table(
-            cellText=wrapped_rows,
-            colLabels=headers,
-            cellLoc='center',
-            loc='center',
-            colWidths=col_widths,
+        data = _render_bytes(
+            headers, rows, wrap_width, transparent, dpi, compress_level,
+            _wants_jpeg(output_path, transparent),
         )
+        if data is None:
+            return False
+        _write_file(output_path, data)
         
-        table.auto_set_font_size(False)
-        table.set_fontsize(8)
-        
-        # Adjust row heights
-        for i, max_lines in enumerate(max_lines_per_row):
-            for j in range(len(headers)):
-                cell = table[(i + 1, j)]
-                cell.set_height(max_lines * 0.08)
-        
-        for j in range(len(headers)):
-            table[(0, j)].set_height(0.08)
-        
-        # Discord-like dark theme
-        for (row, col), cell in table.get_celld().items():
-            cell.set_edgecolor('#4f545c')
-            cell.set_linewidth(1.5)
-            if row == 0:  # Header
-                cell.set_facecolor('#202225')
-                cell.set_text_props(color='#ffffff', fontweight='bold', fontsize=8)
-            else:
-                cell.set_facecolor('#2f3136')
-                cell.set_text_props(color='#dcddde', fontsize=8)
-        
-        if transparent:
-            fig.patch.set_alpha(0)
-            ax.patch.set_alpha(0)
-            plt.savefig(output_path, bbox_inches='tight', dpi=150, transparent=True, pad_inches=0.1)
-        else:
-            fig.patch.set_facecolor('#2f3136')
-            plt.savefig(output_path, bbox_inches='tight', dpi=150, facecolor='#2f3136', pad_inches=0.1)
-        
-        plt.close()
         logger.info(f"Rendered table to {output_path}")
         return True
         
@@ -137,6 +367,85 @@ def render_table_to_image(
         return False
 
 
+async def render_table_to_image_async(
+    headers: list[str],
+    rows: list[list[str]],
+    output_path: str,
+    wrap_width: int = 35,
+    transparent: bool = _TRANSPARENT_DEFAULT,
+    dpi: int = 100,
+    compress_level: int = 1,
+) -> bool:
+    """
+    Async wrapper for render_table_to_image - runs in the render pool to avoid blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _RENDER_POOL,
+        functools.partial(
+            render_table_to_image, headers, rows, output_path,
+            wrap_width, transparent, dpi, compress_level,
+        ),
+    )
+
+
+def _is_table_line(line: str) -> bool:
+    """A stripped line that looks like a table row: |...|"""
+    return len(line) > 2 and line[0] == '|' and line[-1] == '|'
+
+
+def _split_row(line: str) -> list[str]:
+    """Split a stripped |a|b| line into cell values."""
+    return [cell.strip() for cell in line.strip('|').split('|')]
+
+
+def _find_tables(text: str) -> list[tuple[int, int, list[str], list[list[str]]]]:
+    """
+    Find Markdown tables with a single line scan (no regex backtracking).
+    A table is a |...| header line, a |---|---| separator line and one or more |...| rows.
+    
+    Args:
+        text: Text that may contain Markdown tables
+        
+    Returns:
+        List of (start, end, headers, rows) - text[start:end] is the table source,
+        headers/rows are the (shared, immutable) tuples from _parse_cached.
+        Rows with a different column count than the header are dropped;
+        tables left without rows are skipped.
+    """
+    tables = []
+    if '|' not in text:
+        return tables
+    
+    lines = text.splitlines(keepends=True)
+    offsets = list(itertools.accumulate(map(len, lines), initial=0))
+    n = len(lines)
+    
+    i = 0
+    while i + 2 < n:
+        header_line = lines[i].strip()
+        sep_line = lines[i + 1].strip()
+        if not (_is_table_line(header_line) and _is_table_line(sep_line) and _SEP_RE.match(sep_line)):
+            i += 1
+            continue
+        
+        # Consume body rows
+        j = i + 2
+        while j < n and _is_table_line(lines[j].strip()):
+            j += 1
+        if j == i + 2:
+            i += 1
+            continue
+        
+        start, end = offsets[i], offsets[j]
+        parsed = _parse_cached(text[start:end])
+        if parsed:
+            tables.append((start, end, *parsed))
+        i = j
+    
+    return tables
+
+
 def parse_markdown_table(text: str) -> Optional[tuple[list[str], list[list[str]]]]:
     """
     Parse a Markdown table from text.
@@ -147,7 +456,22 @@ def parse_markdown_table(text: str) -> Optional[tuple[list[str], list[list[str]]
     Returns:
         Tuple of (headers, rows) or None if parsing fails
     """
-    lines = text.strip().split('\n')
+    parsed = _parse_cached(text)
+    if parsed is None:
+        return None
+    
+    headers, rows = parsed
+    return list(headers), [list(row) for row in rows]
+
+
+@lru_cache(maxsize=256)
+def _parse_cached(text: str) -> Optional[tuple[tuple[str, ...], tuple[tuple[str, ...], ...]]]:
+    """
+    Parse a Markdown table, memoized on the table text (repeated tables across
+    responses/retries skip the split work). Returns immutable tuples so the
+    cached value can be shared safely.
+    """
+    lines = text.strip().splitlines()
     if len(lines) < 3:
         return None
     
@@ -156,10 +480,10 @@ def parse_markdown_table(text: str) -> Optional[tuple[list[str], list[list[str]]
     if not header_line.startswith('|') or not header_line.endswith('|'):
         return None
     
-    headers = [cell.strip() for cell in header_line.strip('|').split('|')]
+    headers = tuple(_split_row(header_line))
     
     # Skip separator line (line with ---)
-    if not re.match(r'^[\s|:-]+$', lines[1]):
+    if not _SEP_RE.match(lines[1]):
         return None
     
     # Parse rows
@@ -168,74 +492,253 @@ def parse_markdown_table(text: str) -> Optional[tuple[list[str], list[list[str]]
         line = line.strip()
         if not line.startswith('|') or not line.endswith('|'):
             continue
-        row = [cell.strip() for cell in line.strip('|').split('|')]
+        row = tuple(_split_row(line))
         if len(row) == len(headers):
             rows.append(row)
     
     if not rows:
         return None
     
-    return headers, rows
+    return headers, tuple(rows)
+
+
+def _monospace_safe(cell: str) -> bool:
+    """True if the cell lines up in a code block (no wide/combining chars, no ``` fence)."""
+    if '```' in cell:
+        return False
+    if cell.isascii():
+        return True
+    return not any(
+        unicodedata.combining(ch) or unicodedata.east_asian_width(ch) in ('W', 'F')
+        for ch in cell
+    )
 
 
-def process_markdown_tables(text: str, output_dir: str = "/tmp") -> tuple[str, list[tuple[str, str]]]:
+def _text_table(headers: list[str], rows: list[list[str]]) -> Optional[str]:
+    """
+    Aligned plain-text version of a small table as a Discord code block.
+    
+    Returns:
+        The code block, or None if the table is too big (or not monospace-safe) and needs an image
+    """
+    # Header + separator + rows
+    if len(rows) + 2 > _TEXT_TABLE_MAX_LINES:
+        return None
+    
+    widths = [len(h) for h in headers]
+    for row in rows:
+        for j, cell in enumerate(row):
+            if len(cell) > widths[j]:
+                widths[j] = len(cell)
+    
+    # "| a | b |" = cells + 3 chars per column + closing pipe
+    if sum(widths) + 3 * len(widths) + 1 > _TEXT_TABLE_MAX_WIDTH:
+        return None
+    
+    if not all(map(_monospace_safe, headers)) or not all(_monospace_safe(c) for row in rows for c in row):
+        return None
+    
+    def fmt(cells: list[str]) -> str:
+        return "| " + " | ".join(cell.ljust(w) for cell, w in zip(cells, widths)) + " |"
+    
+    lines = [fmt(headers), "|" + "|".join("-" * (w + 2) for w in widths) + "|"]
+    lines.extend(fmt(row) for row in rows)
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def _cache_render(table_hash: str, image_path: str):
+    """Remember a rendered image, deleting the least recently used one when full."""
+    _RENDER_CACHE[table_hash] = image_path
+    _RENDER_CACHE.move_to_end(table_hash)
+    
+    while len(_RENDER_CACHE) > _MAX_CACHE:
+        _, old_path = _RENDER_CACHE.popitem(last=False)
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+
+
+def _table_hash(table_text: str, wrap_width: int, transparent: bool) -> str:
+    """Unique id for a table image (render options are part of the key)."""
+    # 4-byte digest = 8 hex chars, computed directly (no full MD5 then slice)
+    return hashlib.blake2b(f"{wrap_width}:{transparent}:{table_text}".encode(), digest_size=4).hexdigest()
+
+
+def _cached_render(table_hash: str) -> Optional[str]:
+    """Path of a previously rendered image for this hash, if it still exists."""
+    cached_path = _RENDER_CACHE.get(table_hash)
+    if cached_path and os.path.exists(cached_path):
+        _RENDER_CACHE.move_to_end(table_hash)
+        return cached_path
+    return None
+
+
+def _plan_tables(
+    text: str,
+    tables: list[tuple[int, int, list[str], list[list[str]]]],
+    output_dir: str,
+    wrap_width: int,
+    transparent: bool,
+    prefer_text: bool,
+) -> tuple[list[tuple], dict[str, tuple]]:
+    """
+    Decide what replaces each table: a code block, a cached image or an image still to render.
+    
+    Returns:
+        Tuple of (resolved, to_render):
+        - resolved: [(start, end, replacement, key, image_path)] - replacement is the code block,
+          key/image_path identify the image
+        - to_render: key -> (headers, rows, image_path) for images not in the cache
+    """
+    resolved = []
+    to_render = {}
+    
+    for start, end, headers, rows in tables:
+        # Small table - code block, no render
+        text_table = _text_table(headers, rows) if prefer_text else None
+        if text_table:
+            trailing = "\n" if text.endswith("\n", start, end) else ""
+            resolved.append((start, end, text_table + trailing, None, None))
+            continue
+        
+        # Same table rendered before - reuse the image
+        table_hash = _table_hash(text[start:end], wrap_width, transparent)
+        image_path = _cached_render(table_hash)
+        if image_path is None:
+            if table_hash not in to_render:
+                image_path = os.path.join(output_dir, f"table_{table_hash}.png")
+                to_render[table_hash] = (headers, rows, image_path)
+            image_path = to_render[table_hash][2]
+        resolved.append((start, end, None, table_hash, image_path))
+    
+    return resolved, to_render
+
+
+def _record_renders(to_render: dict[str, tuple], results: list[bool]) -> set[str]:
+    """Cache successful renders; return the keys that failed."""
+    failed = set()
+    for (key, (*_, image_path)), ok in zip(to_render.items(), results):
+        if ok:
+            _cache_render(key, image_path)
+        else:
+            failed.add(key)
+    return failed
+
+
+def _apply_plan(text: str, resolved: list[tuple], failed: set[str]) -> tuple[str, list[tuple[str, str]]]:
+    """Rebuild the text once: tables -> code blocks / placeholders (original text if rendering failed)."""
+    out = []
+    images = []
+    last = 0
+    
+    for start, end, replacement, key, image_path in resolved:
+        out.append(text[last:start])
+        if key is not None and key in failed:
+            out.append(text[start:end])
+        elif replacement is not None:
+            out.append(replacement)
+        else:
+            placeholder = f"[-TABLE_IMG:{key}-]"
+            out.append(placeholder)
+            images.append((placeholder, image_path))
+        last = end
+    out.append(text[last:])
+    
+    return "".join(out), images
+
+
+def process_markdown_tables(
+    text: str,
+    output_dir: str = "/tmp",
+    wrap_width: int = 35,
+    transparent: bool = _TRANSPARENT_DEFAULT,
+    prefer_text: bool = True,
+) -> tuple[str, list[tuple[str, str]]]:
     """
     Process Markdown tables in text:
     - Find tables (lines starting with |...)
-    - Render to image
-    - Replace with placeholder
+    - Small tables: replace with an aligned code block (if prefer_text)
+    - Others: render to image and replace with placeholder
     
     Args:
         text: Text containing Markdown tables
         output_dir: Directory to save rendered images
+        wrap_width: Character width for text wrapping
+        transparent: Whether to use transparent background
+        prefer_text: Send tables that fit as a code block instead of rendering them
         
     Returns:
         Tuple of (processed_text, [(placeholder, image_path), ...])
     """
+    tables = _find_tables(text)
+    if not tables:
+        return text, []
+    
     os.makedirs(output_dir, exist_ok=True)
     
-    # Pattern to match markdown tables
-    # Table: starts with |, has separator line with ---, multiple rows
-    table_pattern = r'(\|[^\n]+\|\n\|[\s:-]+\|\n(?:\|[^\n]+\|\n?)+)'
+    resolved, to_render = _plan_tables(
+        text, tables, output_dir, wrap_width, transparent, prefer_text
+    )
+    results = [
+        render_table_to_image(headers, rows, image_path, wrap_width, transparent)
+        for headers, rows, image_path in to_render.values()
+    ]
+    failed = _record_renders(to_render, results)
     
-    images = []
+    return _apply_plan(text, resolved, failed)
+
+
+async def process_markdown_tables_async(
+    text: str,
+    output_dir: str = "/tmp",
+    wrap_width: int = 35,
+    transparent: bool = _TRANSPARENT_DEFAULT,
+    prefer_text: bool = True,
+) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Async version of process_markdown_tables.
+    All tables in the text are rendered in parallel in the render pool, off the event loop.
     
-    def process_table(match):
-        table_text = match.group(1)
-        parsed = parse_markdown_table(table_text)
-        
-        if not parsed:
-            return table_text  # Return original if can't parse
-        
-        headers, rows = parsed
-        
-        # Generate unique filename
-        table_hash = hashlib.md5(table_text.encode()).hexdigest()[:8]
-        image_path = os.path.join(output_dir, f"table_{table_hash}.png")
-        placeholder = f"[-TABLE_IMG:{table_hash}-]"
-        
-        if render_table_to_image(headers, rows, image_path):
-            images.append((placeholder, image_path))
-            return placeholder
-        else:
-            return table_text  # Return original on failure
+    Returns:
+        Tuple of (processed_text, [(placeholder, image_path), ...])
+    """
+    tables = _find_tables(text)
+    if not tables:
+        return text, []
     
-    processed = re.sub(table_pattern, process_table, text)
+    os.makedirs(output_dir, exist_ok=True)
     
-    return processed, images
+    resolved, to_render = _plan_tables(
+        text, tables, output_dir, wrap_width, transparent, prefer_text
+    )
+    results = await asyncio.gather(*(
+        render_table_to_image_async(headers, rows, image_path, wrap_width, transparent)
+        for headers, rows, image_path in to_render.values()
+    ))
+    failed = _record_renders(to_render, results)
+    
+    return _apply_plan(text, resolved, failed)
 
 
 def cleanup_table_images(images: list[tuple[str, str]]):
     """
-    Clean up rendered table images.
+    Clean up rendered table images after sending.
+    Images still held in the render cache are kept for reuse
+    (they are deleted when evicted). Other images in the list
+    (e.g. LaTeX formulas sent alongside) are deleted.
     
     Args:
         images: List of (placeholder, image_path) tuples
     """
-    for _, image_path in images:
+    cached_paths = set(_RENDER_CACHE.values())
+    paths = [path for _, path in images if path not in cached_paths]
+    
+    for image_path in paths:
         try:
-            if os.path.exists(image_path):
-                os.remove(image_path)
-                logger.debug(f"Cleaned up table image: {image_path}")
-        except Exception as e:
+            os.unlink(image_path)
+            logger.debug(f"Cleaned up table image: {image_path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
             logger.warning(f"Failed to cleanup {image_path}: {e}")
@@ -0,0 +1,118 @@
+"""
+Tests for Gemini usage journal persistence.
+"""
+import json
+
+import pytest
+
+from services import gemini_keys
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    """Point the journal at a temp dir, start with an empty cache on a fixed PT date."""
+    path = tmp_path / "gemini_usage.jsonl"
+    monkeypatch.setattr(gemini_keys, "USAGE_JOURNAL", path)
+    monkeypatch.setattr(gemini_keys, "LEGACY_USAGE_FILE", tmp_path / "gemini_usage.json")
+    monkeypatch.setattr(gemini_keys, "_usage_cache", None)
+    monkeypatch.setattr(gemini_keys, "_usage_date", None)
+    monkeypatch.setattr(gemini_keys, "get_pt_date", lambda: "2026-01-02")
+    return path
+
+
+def _record(user, date, key_hash, **extra) -> str:
+    return json.dumps({"u": user, "d": date, "k": key_hash, "t": 0, **extra}) + "\n"
+
+
+def _reload():
+    """Drop the in-memory counts so the next call replays the journal."""
+    gemini_keys._usage_cache = None
+
+
+class TestJournalReplay:
+    """Tests for replaying the usage journal."""
+    
+    def test_increments_are_persisted_and_replayed(self, journal):
+        """Counts survive a restart (cache reset) via the journal."""
+        for _ in range(3):
+            gemini_keys.increment_request_count(1, "key-a")
+        gemini_keys.increment_request_count(1, "key-b")
+        gemini_keys.increment_request_count(2, "key-a")
+        
+        _reload()
+        
+        assert gemini_keys.get_key_count(1, "key-a") == 3
+        assert gemini_keys.get_key_count(1, "key-b") == 1
+        assert gemini_keys.get_key_count(2, "key-a") == 1
+        assert len(journal.read_text().splitlines()) == 5
+    
+    def test_missing_journal_means_zero(self, journal):
+        """No journal yet - every key starts at zero."""
+        assert gemini_keys.get_daily_counts(1) == {}
+    
+    def test_malformed_lines_are_skipped_and_compacted(self, journal):
+        """Unreadable lines don't break replay and are dropped on compaction."""
+        journal.write_text(
+            _record(1, "2026-01-02", "aaaa")
+            + "{not json\n"
+            + _record(1, "2026-01-02", "aaaa")
+        )
+        
+        assert gemini_keys.get_daily_counts(1) == {"aaaa": 2}
+        assert journal.read_text() == _record(1, "2026-01-02", "aaaa") * 2
+
+
+class TestDateRollover:
+    """Tests for PT date rollover."""
+    
+    def test_old_days_are_ignored_and_compacted(self, journal):
+        """Only today's records count; older days are removed from the file."""
+        journal.write_text(
+            _record(1, "2026-01-01", "aaaa")
+            + _record(1, "2026-01-02", "bbbb")
+            + _record(1, "2026-01-01", "bbbb")
+        )
+        
+        assert gemini_keys.get_daily_counts(1) == {"bbbb": 1}
+        assert journal.read_text() == _record(1, "2026-01-02", "bbbb")
+    
+    def test_rollover_while_running_resets_counts(self, journal, monkeypatch):
+        """A cached day is replaced when the PT date changes."""
+        gemini_keys.increment_request_count(1, "key-a")
+        assert gemini_keys.get_key_count(1, "key-a") == 1
+        
+        monkeypatch.setattr(gemini_keys, "get_pt_date", lambda: "2026-01-03")
+        
+        assert gemini_keys.get_key_count(1, "key-a") == 0
+        assert journal.read_text() == ""
+
+
+class TestLegacyMigration:
+    """Tests for seeding the journal from gemini_usage.json."""
+    
+    def test_today_counts_are_migrated_once(self, journal):
+        """Today's legacy counts carry over; other days are dropped and the old file removed."""
+        legacy = journal.with_name("gemini_usage.json")
+        key_hash = gemini_keys._hash_key("key-a")
+        legacy.write_text(json.dumps({
+            "1": {"2026-01-02": {key_hash: 20, "cccc": 0}},
+            "2": {"2026-01-01": {key_hash: 5}},
+        }))
+        
+        assert gemini_keys.is_key_rate_limited(1, "key-a", limit=20)
+        assert gemini_keys.get_daily_counts(2) == {}
+        assert not legacy.exists()
+        
+        # Replaying again uses the journal only - counts are not doubled
+        _reload()
+        gemini_keys.increment_request_count(1, "key-a")
+        _reload()
+        assert gemini_keys.get_key_count(1, "key-a") == 21
+    
+    def test_unreadable_legacy_file_is_removed(self, journal):
+        """A corrupt legacy file is discarded instead of blocking startup."""
+        legacy = journal.with_name("gemini_usage.json")
+        legacy.write_text("{broken")
+        
+        assert gemini_keys.get_daily_counts(1) == {}
+        assert not legacy.exists()
@@ -0,0 +1,121 @@
+"""
+Tests for the video processing queue.
+"""
+import asyncio
+
+import pytest
+
+from services import queue
+
+
+@pytest.fixture(autouse=True)
+def fresh_queue(monkeypatch):
+    """Each test gets its own job queue and worker (asyncio.run uses a new loop)."""
+    monkeypatch.setattr(queue, "_jobs", asyncio.Queue())
+    monkeypatch.setattr(queue, "_worker_task", None)
+    monkeypatch.setattr(queue, "_busy", False)
+
+
+def test_runs_jobs_in_order():
+    """Jobs run one at a time, in submission order."""
+    order = []
+    
+    def job(n):
+        async def run():
+            order.append(n)
+            await asyncio.sleep(0)
+            return n
+        return run
+    
+    async def main():
+        return await asyncio.gather(*(queue.submit(job(n)) for n in range(3)))
+    
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert order == [0, 1, 2]
+
+
+def test_job_error_is_raised_to_submitter():
+    """A failing job re-raises in its submitter; the next job still runs."""
+    async def bad():
+        raise ValueError("boom")
+    
+    async def good():
+        return "ok"
+    
+    async def main():
+        return await asyncio.gather(queue.submit(bad), queue.submit(good), return_exceptions=True)
+    
+    error, result = asyncio.run(main())
+    assert isinstance(error, ValueError)
+    assert result == "ok"
+
+
+def test_cancelled_job_does_not_stop_worker():
+    """A job raising CancelledError cancels only its own submitter."""
+    async def cancelled_job():
+        raise asyncio.CancelledError()
+    
+    async def good():
+        return 42
+    
+    async def main():
+        first = asyncio.ensure_future(queue.submit(cancelled_job))
+        second = asyncio.ensure_future(queue.submit(good))
+        result = await asyncio.wait_for(second, timeout=1)
+        return first, result
+    
+    first, result = asyncio.run(main())
+    assert first.cancelled()
+    assert result == 42
+
+
+def test_cancelled_waiting_submitter_is_skipped():
+    """A submitter that gave up while queued never has its job started."""
+    started = []
+    release = None
+    
+    async def blocker():
+        started.append("blocker")
+        await release.wait()
+    
+    async def skipped():
+        started.append("skipped")
+    
+    async def last():
+        started.append("last")
+        return "done"
+    
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.ensure_future(queue.submit(blocker))
+        waiting = asyncio.ensure_future(queue.submit(skipped))
+        await asyncio.sleep(0.01)
+        
+        waiting.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        result = await asyncio.wait_for(queue.submit(last), timeout=1)
+        await first
+        return result
+    
+    assert asyncio.run(main()) == "done"
+    assert started == ["blocker", "last"]
+
+
+def test_cancelling_worker_cancels_running_job():
+    """Cancelling the worker task stops it and cancels the running job."""
+    async def forever():
+        await asyncio.sleep(3600)
+    
+    async def main():
+        submitter = asyncio.ensure_future(queue.submit(forever))
+        await asyncio.sleep(0.01)
+        queue._worker_task.cancel()
+        await asyncio.sleep(0.01)
+        return submitter, queue._worker_task
+    
+    submitter, worker = asyncio.run(main())
+    assert submitter.cancelled()
+    assert worker.cancelled()
@@ -0,0 +1,75 @@
+"""
+Tests for ffmpeg frame extraction commands (ffmpeg itself is faked).
+"""
+import asyncio
+
+import pytest
+
+from services import video
+
+
+class _FakeProcess:
+    returncode = 0
+    
+    async def communicate(self):
+        return b"", b""
+    
+    async def wait(self):
+        return 0
+
+
+@pytest.fixture
+def ffmpeg_calls(monkeypatch):
+    """Record ffmpeg commands; 'produce' every .jpg output they name."""
+    calls = []
+    
+    async def fake_exec(*cmd, **kwargs):
+        calls.append(list(cmd))
+        for arg in cmd:
+            if arg.endswith(".jpg"):
+                with open(arg, "wb") as f:
+                    f.write(b"\xff\xd8\xff")
+        return _FakeProcess()
+    
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    return calls
+
+
+class TestExtractFramesBatch:
+    """Tests for extract_frames_batch function."""
+    
+    def test_inputs_are_bounded_per_process(self, ffmpeg_calls, tmp_path):
+        """Timestamps are split into FRAME_BATCH_SIZE inputs per ffmpeg call."""
+        seconds = list(range(0, 200, 10))  # 20 frames
+        frames = asyncio.run(video.extract_frames_batch("in.mp4", seconds, str(tmp_path)))
+        
+        assert sorted(frames) == seconds
+        assert [cmd.count("-i") for cmd in ffmpeg_calls] == [8, 8, 4]
+    
+    def test_each_decoder_is_single_threaded(self, ffmpeg_calls, tmp_path):
+        """Every input is preceded by -threads 1 (a per-input decoder option)."""
+        asyncio.run(video.extract_frames_batch("in.mp4", [5, 10, 5], str(tmp_path)))
+        
+        cmd = ffmpeg_calls[0]
+        inputs = [i for i, arg in enumerate(cmd) if arg == "-i"]
+        assert len(inputs) == 2  # Duplicate timestamp extracted once
+        for i in inputs:
+            assert cmd[i - 4:i - 2] == ["-threads", "1"]
+    
+    def test_empty_list_runs_nothing(self, ffmpeg_calls, tmp_path):
+        """No timestamps - no ffmpeg process."""
+        assert asyncio.run(video.extract_frames_batch("in.mp4", [], str(tmp_path))) == {}
+        assert ffmpeg_calls == []
+
+
+class TestExtractFrame:
+    """Tests for extract_frame function."""
+    
+    def test_single_threaded_fast_seek(self, ffmpeg_calls, tmp_path):
+        """The decoder is single-threaded and the seek happens before -i."""
+        path = asyncio.run(video.extract_frame("in.mp4", 42, str(tmp_path)))
+        
+        cmd = ffmpeg_calls[0]
+        i = cmd.index("-i")
+        assert path is not None
+        assert cmd[i - 4:i] == ["-threads", "1", "-ss", "42"]
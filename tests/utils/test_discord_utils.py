@@ -0,0 +1,79 @@
+"""
+Tests for Discord message chunking.
+"""
+import random
+
+import pytest
+
+pytest.importorskip("discord")
+
+from utils.discord_utils import _split_chunks
+from utils.table_utils import process_markdown_tables
+
+
+def _assert_lossless(text: str, chunks: list[str], chunk_size: int):
+    """Chunks fit the limit and only boundary newlines are dropped."""
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) <= len(text)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+    # Exactly one newline is consumed per newline-boundary split
+    assert len(text) - sum(len(chunk) for chunk in chunks) <= len(chunks) - 1
+
+
+class TestSplitChunks:
+    """Tests for _split_chunks function."""
+    
+    def test_short_text_is_single_chunk(self):
+        """Text within the limit is returned unchanged."""
+        assert list(_split_chunks("hello\nworld", 50)) == ["hello\nworld"]
+    
+    def test_breaks_at_newlines(self):
+        """Chunks end at the last newline that fits."""
+        text = "aaaa\nbbbb\ncccc"
+        assert list(_split_chunks(text, 10)) == ["aaaa\nbbbb", "cccc"]
+    
+    def test_hard_splits_long_lines(self):
+        """A line longer than chunk_size is cut at chunk_size."""
+        assert list(_split_chunks("x" * 25, 10)) == ["x" * 10, "x" * 10, "x" * 5]
+    
+    def test_random_text_fits_and_loses_nothing(self):
+        """Randomised input: every chunk fits and all text survives in order."""
+        rng = random.Random(1234)
+        for _ in range(300):
+            lines = [
+                "y" * rng.choice([0, 0, 1, 5, 30, 80, 250])
+                for _ in range(rng.randint(1, 40))
+            ]
+            text = "\n".join(lines)
+            chunk_size = rng.choice([1, 7, 50, 100, 1900])
+            chunks = list(_split_chunks(text, chunk_size))
+            _assert_lossless(text, chunks, chunk_size)
+    
+    def test_code_block_moves_to_next_chunk(self):
+        """A block that would straddle the limit starts the next chunk instead."""
+        text = "intro\n```\ncode 1\ncode 2\n```\nafter"
+        chunks = list(_split_chunks(text, 24))
+        
+        assert chunks[0] == "intro"
+        assert chunks[1] == "```\ncode 1\ncode 2\n```"
+    
+    def test_oversized_code_block_is_still_split(self):
+        """A block longer than chunk_size can't be kept whole - normal splitting applies."""
+        text = "```\n" + "line\n" * 10 + "```"
+        chunks = list(_split_chunks(text, 20))
+        
+        _assert_lossless(text, chunks, 20)
+    
+    def test_table_code_blocks_are_never_split(self, tmp_path):
+        """process_markdown_tables output: every chunk has balanced fences."""
+        rows = "".join(f"| row {i} | value {i} | note {i} |\n" for i in range(17))
+        table = "| Col A | Col B | Col C |\n|---|---|---|\n" + rows
+        
+        for prefix_len in range(1500, 1900, 37):
+            summary = ("word " * 400)[:prefix_len] + "\n\n" + table + "\nTail text\n" + table
+            text, images = process_markdown_tables(summary, output_dir=str(tmp_path))
+            assert images == []
+            
+            chunks = list(_split_chunks(text, 1900))
+            assert all(len(chunk) <= 1900 for chunk in chunks)
+            assert all(chunk.count("```") % 2 == 0 for chunk in chunks)
@@ -0,0 +1,39 @@
+"""
+Tests for Drive magic-byte detection.
+"""
+import pytest
+
+pytest.importorskip("httpx")
+
+from utils.drive_utils import detect_file_type
+
+
+class TestDetectFileType:
+    """Tests for detect_file_type function."""
+    
+    def test_riff_webp_is_image(self):
+        """WebP shares the RIFF prefix with AVI but must not be a video."""
+        assert detect_file_type(b"RIFF\x24\x00\x00\x00WEBPVP8 ") == "image"
+    
+    def test_riff_avi_is_video(self):
+        """AVI is identified by its RIFF subtype."""
+        assert detect_file_type(b"RIFF\x24\x00\x00\x00AVI LIST") == "video"
+    
+    def test_riff_wave_is_unknown(self):
+        """Unlisted RIFF subtypes (WAV audio) are not accepted."""
+        assert detect_file_type(b"RIFF\x24\x00\x00\x00WAVEfmt ") == "unknown"
+    
+    def test_matches_any_signature_in_group(self):
+        """Each entry of a signature group is checked, not just the first."""
+        assert detect_file_type(b"%PDF-1.7\n") == "pdf"
+        assert detect_file_type(b"\x00\x00\x00\x20ftypisom") == "video"
+        assert detect_file_type(b"\x1aE\xdf\xa3\x01\x00") == "video"
+        assert detect_file_type(b"\xff\xd8\xff\xe0\x00\x10JFIF") == "image"
+        assert detect_file_type(b"GIF89a") == "image"
+        assert detect_file_type(b"<html><head>") == "html"
+    
+    def test_unknown_and_short_input(self):
+        """Unrecognised or truncated data returns unknown."""
+        assert detect_file_type(b"PK\x03\x04") == "unknown"
+        assert detect_file_type(b"RIFF") == "unknown"
+        assert detect_file_type(b"") == "unknown"
@@ -0,0 +1,198 @@
+"""
+Tests for Markdown table detection and replacement.
+"""
+import os
+
+import pytest
+
+from utils import table_utils
+from utils.table_utils import _find_tables, _text_table, process_markdown_tables
+
+
+SMALL_TABLE = "| Name | Score |\n|---|:---:|\n| An | 9 |\n| Binh | 10 |\n"
+
+
+class TestFindTables:
+    """Tests for _find_tables function."""
+    
+    def test_finds_multi_column_table_span(self):
+        """Multi-column tables are found; text[start:end] is exactly the table source."""
+        text = "Intro\n" + SMALL_TABLE + "Outro"
+        tables = _find_tables(text)
+        
+        assert len(tables) == 1
+        start, end, headers, rows = tables[0]
+        assert text[start:end] == SMALL_TABLE
+        assert list(headers) == ["Name", "Score"]
+        assert [list(row) for row in rows] == [["An", "9"], ["Binh", "10"]]
+    
+    def test_finds_each_table_separately(self):
+        """Tables separated by text are reported in order with their own spans."""
+        second = "|a|b|c|\n|-|-|-|\n|1|2|3|"
+        text = SMALL_TABLE + "\nbetween\n" + second
+        spans = [text[start:end] for start, end, _, _ in _find_tables(text)]
+        
+        assert spans == [SMALL_TABLE, second]
+    
+    def test_requires_separator_and_body(self):
+        """Pipe lines without a separator row, or without body rows, are not tables."""
+        assert _find_tables("|a|b|\n|1|2|\n|3|4|\n") == []
+        assert _find_tables("|a|b|\n|---|---|\ntext\n") == []
+        assert _find_tables("no pipes here") == []
+    
+    def test_drops_rows_with_wrong_column_count(self):
+        """Rows that don't match the header width are skipped."""
+        text = "|a|b|\n|---|---|\n|1|2|\n|only|\n"
+        _, _, _, rows = _find_tables(text)[0]
+        
+        assert [list(row) for row in rows] == [["1", "2"]]
+
+
+class TestTextTable:
+    """Tests for _text_table function."""
+    
+    def test_exact_code_block(self):
+        """Small tables become an aligned code block."""
+        result = _text_table(["Name", "Score"], [["An", "9"], ["Binh", "10"]])
+        
+        assert result == (
+            "```\n"
+            "| Name | Score |\n"
+            "|------|-------|\n"
+            "| An   | 9     |\n"
+            "| Binh | 10    |\n"
+            "```"
+        )
+    
+    def test_vietnamese_precomposed_is_allowed(self):
+        """Precomposed accented letters are single-width and stay as text."""
+        assert _text_table(["Tên"], [["Đúng"]]) is not None
+    
+    @pytest.mark.parametrize("cell", [
+        "漢字",            # East Asian wide
+        "e\u0301",          # Combining accent
+        "```code```",      # Would close the code block
+    ])
+    def test_unsafe_cells_need_image(self, cell):
+        """Cells that break monospace alignment fall back to an image."""
+        assert _text_table(["A", "B"], [[cell, "x"]]) is None
+    
+    def test_too_wide_or_too_long_needs_image(self):
+        """Tables over the width/line limits fall back to an image."""
+        assert _text_table(["A"], [["x" * 80]]) is None
+        assert _text_table(["A"], [[str(i)] for i in range(19)]) is None
+
+
+class TestProcessMarkdownTables:
+    """Tests for process_markdown_tables function."""
+    
+    @pytest.fixture
+    def fake_render(self, monkeypatch):
+        """Record renders instead of drawing images."""
+        rendered = []
+        
+        def render(headers, rows, output_path, *args, **kwargs):
+            rendered.append((list(headers), [list(row) for row in rows]))
+            return True
+        
+        monkeypatch.setattr(table_utils, "render_table_to_image", render)
+        monkeypatch.setattr(table_utils, "_RENDER_CACHE", table_utils.OrderedDict())
+        return rendered
+    
+    def test_small_table_becomes_code_block(self, fake_render, tmp_path):
+        """The table is replaced in place, keeping its trailing newline."""
+        text = "Intro\n" + SMALL_TABLE + "Outro"
+        result, images = process_markdown_tables(text, output_dir=str(tmp_path))
+        
+        assert result == (
+            "Intro\n"
+            "```\n"
+            "| Name | Score |\n"
+            "|------|-------|\n"
+            "| An   | 9     |\n"
+            "| Binh | 10    |\n"
+            "```\n"
+            "Outro"
+        )
+        assert images == []
+        assert fake_render == []
+    
+    def test_wide_cells_fall_back_to_image(self, fake_render, tmp_path):
+        """Tables that can't be a code block are rendered and replaced by a placeholder."""
+        text = "Intro\n|Từ|Nghĩa|\n|---|---|\n|漢字|chữ Hán|\nOutro"
+        result, images = process_markdown_tables(text, output_dir=str(tmp_path))
+        
+        assert len(images) == 1
+        placeholder, image_path = images[0]
+        assert result == f"Intro\n{placeholder}Outro"
+        assert image_path.startswith(str(tmp_path))
+        assert fake_render == [(["Từ", "Nghĩa"], [["漢字", "chữ Hán"]])]
+    
+    def test_render_failure_keeps_table_text(self, monkeypatch, tmp_path):
+        """If rendering fails the original Markdown is left untouched."""
+        monkeypatch.setattr(table_utils, "render_table_to_image", lambda *a, **k: False)
+        text = "|A|B|\n|---|---|\n|e\u0301|x|\n"
+        
+        assert process_markdown_tables(text, output_dir=str(tmp_path)) == (text, [])
+
+
+class TestCleanupTableImages:
+    """Tests for cleanup_table_images function."""
+    
+    def test_keeps_cached_renders(self, monkeypatch, tmp_path):
+        """Cached table images survive cleanup; everything else is deleted."""
+        cached = tmp_path / "table_cached.png"
+        formula = tmp_path / "formula.png"
+        uncached = tmp_path / "table_other.png"
+        for path in (cached, formula, uncached):
+            path.write_bytes(b"png")
+        monkeypatch.setattr(table_utils, "_RENDER_CACHE", table_utils.OrderedDict(abc=str(cached)))
+        
+        table_utils.cleanup_table_images([
+            ("[-TABLE_IMG:abc-]", str(cached)),
+            ("[-LATEX-]", str(formula)),
+            ("[-TABLE_IMG:def-]", str(uncached)),
+            ("[-TABLE_IMG:gone-]", str(tmp_path / "missing.png")),
+        ])
+        
+        assert cached.exists()
+        assert not formula.exists()
+        assert not uncached.exists()
+
+
+class TestFontFiles:
+    """Tests for _font_files function."""
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        table_utils._font_files.cache_clear()
+        yield
+        table_utils._font_files.cache_clear()
+    
+    def test_falls_back_to_matplotlib_fonts(self, monkeypatch):
+        """Without a system DejaVu install, matplotlib's bundled copy is used."""
+        ImageFont = pytest.importorskip("PIL.ImageFont")
+        pytest.importorskip("matplotlib")
+        real_truetype = ImageFont.truetype
+        
+        def truetype(font, *args, **kwargs):
+            if not os.path.isabs(font):
+                raise OSError("cannot open resource")
+            return real_truetype(font, *args, **kwargs)
+        
+        monkeypatch.setattr(ImageFont, "truetype", truetype)
+        regular, bold = table_utils._font_files()
+        
+        assert "mpl-data" in regular and regular.endswith("DejaVuSans.ttf")
+        assert "mpl-data" in bold and bold.endswith("DejaVuSans-Bold.ttf")
+    
+    def test_no_freetype_disables_rendering(self, monkeypatch):
+        """Pillow without FreeType means no font, not an exception."""
+        ImageFont = pytest.importorskip("PIL.ImageFont")
+        
+        def truetype(*args, **kwargs):
+            raise ImportError("The _imagingft C module is not installed")
+        
+        monkeypatch.setattr(ImageFont, "truetype", truetype)
+        
+        assert table_utils._font_files() is None